@@ -2,6 +2,8 @@ from .testing import MathTest, MathTestVariable  # type: ignore  # noqa: D104, F
 from .fast_ops import *  # noqa: F401,F403
 from .cuda_ops import *  # noqa: F401,F403
 from .tensor_data import *  # noqa: F401,F403
+from .allocator import *  # noqa: F401,F403
+from .profiling import *  # noqa: F401,F403
 from .tensor_functions import *  # noqa: F401,F403
 from .tensor_ops import *  # noqa: F401,F403
 from .scalar import *  # noqa: F401,F403
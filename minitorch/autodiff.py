@@ -1,7 +1,19 @@
 from __future__ import annotations
 
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Iterable, List, Set, Tuple, Protocol
+from typing import (
+    Any,
+    ContextManager,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+)
 
 
 # ## Task 1.1
@@ -39,7 +51,9 @@ variable_count = 1
 
 
 class Variable(Protocol):
-    def accumulate_derivative(self, x: Any) -> None: ...  # noqa: D102
+    history: Any
+
+    def accumulate_derivative(self, x: Any, owned: bool = False) -> None: ...  # noqa: D102
 
     @property
     def unique_id(self) -> int: ...  # noqa: D102
@@ -57,6 +71,9 @@ class Variable(Protocol):
 def topological_sort(variable: Variable) -> Iterable[Variable]:
     """Computes the topological order of the computation graph.
 
+    The graph is walked depth first with an explicit stack, so its depth is
+    not limited by the recursion limit.
+
     Args:
     ----
         variable: The right-most variable
@@ -66,67 +83,136 @@ def topological_sort(variable: Variable) -> Iterable[Variable]:
         Non-constant Variables in topological order starting from the right.
 
     """
-    # TODO: Implement for Task 1.4.
-
-    visited: Set[int] = set()  # Tracks permanently visited nodes
-    sorted_list: List[Variable] = []  # Stores the sorted nodes
-    visit(variable, visited, sorted_list)
-    sorted_list.reverse()  # Reverse the order because we append at the end of recursion
+    visited: Set[int] = set()
+    sorted_list: List[Variable] = []
+    # Entries are (variable, True) once its parents have been pushed.
+    stack: List[Tuple[Variable, bool]] = [(variable, False)]
+    while stack:
+        var, expanded = stack.pop()
+        if expanded:
+            sorted_list.append(var)
+            continue
+        if var.unique_id in visited:
+            continue
+        visited.add(var.unique_id)
+        stack.append((var, True))
+        # Read the history directly: `parents`, `is_leaf` and `is_constant`
+        # are a property and method calls per edge.
+        for parent in var.history.inputs:
+            if parent.history is not None and parent.unique_id not in visited:
+                stack.append((parent, False))
+    sorted_list.reverse()
     return sorted_list
 
 
-def visit(variable: Variable, visited: Set[int], sorted_list: List[Variable]) -> None:
-    """Recursive DFS to visit each node in the computation graph.
-
-    Args:
-    ----
-        variable: The current node to visit
-        visited: Set of visited nodes (to avoid revisiting)
-        sorted_list: The list where sorted nodes are collected
-
-    """
-    # If the variable has already been visited, return early
-    if variable.unique_id in visited:
-        return
-
-    # Visit each parent (i.e., input to this variable) recursively
-    for parent in variable.parents:
-        if not parent.is_constant():  # Skip constants in the topological sort
-            visit(parent, visited, sorted_list)
-
-    # After visiting all parents, mark this variable as visited
-    visited.add(variable.unique_id)
-    # Append this variable to the sorted list (after visiting its dependencies)
-    sorted_list.append(variable)
-
-
-def backpropagate(variable: Variable, deriv: Any) -> None:
+def backpropagate(variable: Variable, deriv: Any, retain_graph: bool = False) -> None:
     """Runs backpropagation on the computation graph in order to
     compute derivatives for the leave nodes.
 
+    Unless `retain_graph`, each node releases its saved values and its
+    inputs once its derivative has been propagated, so intermediate values
+    are freed as the pass goes instead of when the output is dropped. The
+    graph can then not be backpropagated again.
+
+    The first derivative reaching a node is kept as is. The second one is
+    added into a new buffer owned by the pass, and later ones are added
+    into that buffer in place. Owned buffers are handed to leaves, which
+    may keep them as their derivative instead of copying.
+
     Args:
     ----
         variable: The right-most variable
         deriv: Its derivative that we want to propagate backward to the leaves.
+        retain_graph: Keep the graph to backpropagate through it again.
 
     Returns:
     -------
         No return. Should write to its results to the derivative values of each leaf through `accumulate_derivative`.
 
     """
-    queue = topological_sort(variable)
+    # Pop nodes off the end so that processed ones are not kept alive.
+    queue = list(topological_sort(variable))
+    queue.reverse()
     derivatives = {}
     derivatives[variable.unique_id] = deriv
-    for var in queue:
-        deriv = derivatives[var.unique_id]
+    # Ids of the variables whose derivative is a buffer allocated here.
+    owned: Set[int] = set()
+    while queue:
+        var = queue.pop()
+        deriv = derivatives.pop(var.unique_id)
         if var.is_leaf():
-            var.accumulate_derivative(deriv)
-        else:
-            for v, d in var.chain_rule(deriv):
-                if v.is_constant():
-                    continue
-                derivatives.setdefault(v.unique_id, 0.0)
-                derivatives[v.unique_id] = derivatives[v.unique_id] + d
+            var.accumulate_derivative(deriv, var.unique_id in owned)
+            owned.discard(var.unique_id)
+            continue
+        ctx = var.history.ctx
+        assert not ctx.released, (
+            "Backpropagating through a graph a second time, "
+            "pass retain_graph=True to the first backward."
+        )
+        for v, d in var.chain_rule(deriv):
+            if v.is_constant():
+                continue
+            prev = derivatives.get(v.unique_id)
+            if prev is None:
+                derivatives[v.unique_id] = d
+            elif v.unique_id in owned:
+                prev.add_(d)
+            else:
+                derivatives[v.unique_id] = prev + d
+                # Scalar derivatives are floats, which cannot be updated.
+                if hasattr(prev, "add_"):
+                    owned.add(v.unique_id)
+        if not retain_graph:
+            ctx.release()
+            var.history.inputs = ()
+        del var, deriv
+
+
+class _GradMode(threading.local):
+    enabled: bool = True
+    inference: bool = False
+
+
+_grad_mode = _GradMode()
+
+
+def is_grad_enabled() -> bool:
+    """Whether functions applied in this thread record history for backward."""
+    return _grad_mode.enabled
+
+
+@contextmanager
+def _set_grad_mode(enabled: bool, inference: bool) -> Iterator[None]:
+    saved = (_grad_mode.enabled, _grad_mode.inference)
+    _grad_mode.enabled, _grad_mode.inference = enabled, inference
+    try:
+        yield
+    finally:
+        _grad_mode.enabled, _grad_mode.inference = saved
+
+
+def no_grad() -> ContextManager[None]:
+    """Context manager that disables history recording.
+
+    Functions applied inside return constants: no `History` is created and
+    nothing is saved for backward, even if inputs require grad.
+    """
+    return _set_grad_mode(False, _grad_mode.inference)
+
+
+def enable_grad() -> ContextManager[None]:
+    """Context manager that re-enables history recording inside `no_grad`."""
+    return _set_grad_mode(True, False)
+
+
+def inference_mode() -> ContextManager[None]:
+    """Stricter `no_grad` for evaluation.
+
+    `Function.apply` calls `forward` directly on its inputs and returns its
+    output: inputs are not detached and no `Context` is created. The
+    outputs are constants and must not be modified in place.
+    """
+    return _set_grad_mode(False, True)
 
 
 @dataclass
@@ -135,13 +221,29 @@ class Context:
 
     no_grad: bool = False
     saved_values: Tuple[Any, ...] = ()
+    saved_versions: Tuple[Optional[int], ...] = ()
+    released: bool = False
 
     def save_for_backward(self, *values: Any) -> None:
         """Store the given `values` if they need to be used during backpropagation."""
         if self.no_grad:
             return
         self.saved_values = values
+        self.saved_versions = tuple(getattr(v, "version", None) for v in values)
+
+    def check_saved_versions(self) -> None:
+        """Check that no saved value was modified in place since it was saved."""
+        for v, version in zip(self.saved_values, self.saved_versions):
+            assert (
+                version is None or v.version == version
+            ), "A tensor saved for backward was modified by an in-place operation."
 
     @property
     def saved_tensors(self) -> Tuple[Any, ...]:  # noqa: D102
         return self.saved_values
+
+    def release(self) -> None:
+        """Drop the saved values once backward no longer needs them."""
+        self.saved_values = ()
+        self.saved_versions = ()
+        self.released = True
@@ -4,6 +4,8 @@
 from typing import Callable, Optional, TypeVar, Any
 
 import numba
+import numpy as np
+import numpy.typing as npt
 from numba import cuda
 from numba.cuda import jit as _jit
 from .tensor import Tensor
@@ -14,11 +16,12 @@ from .tensor_data import (
     Strides,
     TensorData,
     broadcast_index,
+    float_dtype,
     index_to_position,
     shape_broadcast,
     to_index,
 )
-from .tensor_ops import MapProto, TensorOps
+from .tensor_ops import MapProto, ReduceProto, TensorOps, ZipProto
 
 FakeCUDAKernel = Any
 
@@ -72,14 +75,14 @@ class CudaOps(TensorOps):
     cuda = True
 
     @staticmethod
-    def map(fn: Callable[[float], float]) -> MapProto:
+    def map(fn: Callable[[float], float], keep_dtype: bool = False) -> MapProto:
         """See `tensor_ops.py`"""
         cufn: Callable[[float], float] = device_jit(fn)
         f = tensor_map(cufn)
 
         def ret(a: Tensor, out: Optional[Tensor] = None) -> Tensor:
             if out is None:
-                out = a.zeros(a.shape)
+                out = a.empty(a.shape, None if keep_dtype else float_dtype(a.dtype))
 
             # Instantiate and run the cuda kernel.
             threadsperblock = THREADS_PER_BLOCK
@@ -90,22 +93,26 @@ class CudaOps(TensorOps):
         return ret
 
     @staticmethod
-    def zip(fn: Callable[[float, float], float]) -> Callable[[Tensor, Tensor], Tensor]:
+    def zip(
+        fn: Callable[[float, float], float], out_dtype: Optional[npt.DTypeLike] = None
+    ) -> ZipProto:
         """Creates a function that performs element-wise operations on two tensors using the specified binary operation.
 
         Args:
         ----
             fn (Callable[[float, float], float]): A binary operation function that takes two floats as inputs
                 and returns a float as output.
+            out_dtype (Optional[DTypeLike]): Type of the output, e.g. bool for comparisons. Defaults to
+                `float_dtype` of the promoted type of the inputs.
 
         Returns:
         -------
-            Callable[[Tensor, Tensor], Tensor]: A function that takes two tensors as input, applies the specified
-                element-wise operation, and returns a tensor containing the results.
+            ZipProto: A function that takes two tensors and an optional output tensor as input, applies the
+                specified element-wise operation, and returns a tensor containing the results.
 
         The returned function:
             - Broadcasts the shapes of the input tensors to determine the output shape.
-            - Allocates an output tensor initialized with zeros to hold the results.
+            - Allocates an output tensor initialized with zeros to hold the results, unless one is given.
             - Configures the CUDA kernel launch parameters (blocks per grid and threads per block).
             - Executes the CUDA kernel using the binary operation on the input tensors.
 
@@ -118,9 +125,15 @@ class CudaOps(TensorOps):
         cufn: Callable[[float, float], float] = device_jit(fn)
         f = tensor_zip(cufn)
 
-        def ret(a: Tensor, b: Tensor) -> Tensor:
+        def ret(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
             c_shape = shape_broadcast(a.shape, b.shape)
-            out = a.zeros(c_shape)
+            if out is None:
+                if out_dtype is None:
+                    dtype = float_dtype(np.promote_types(a.dtype, b.dtype))
+                else:
+                    dtype = np.dtype(out_dtype)
+                out = a.empty(c_shape, dtype)
+            assert out.shape == c_shape, f"Output shape {out.shape} != {c_shape}"
             threadsperblock = THREADS_PER_BLOCK
             blockspergrid = (out.size + (threadsperblock - 1)) // threadsperblock
             f[blockspergrid, threadsperblock](  # type: ignore
@@ -133,14 +146,18 @@ class CudaOps(TensorOps):
     @staticmethod
     def reduce(  # noqa: D102
         fn: Callable[[float, float], float], start: float = 0.0
-    ) -> Callable[[Tensor, int], Tensor]:
+    ) -> ReduceProto:
         cufn: Callable[[float, float], float] = device_jit(fn)
         f = tensor_reduce(cufn)
 
-        def ret(a: Tensor, dim: int) -> Tensor:
+        def ret(a: Tensor, dim: int, out: Optional[Tensor] = None) -> Tensor:
             out_shape = list(a.shape)
-            out_shape[dim] = (a.shape[dim] - 1) // 1024 + 1
-            out_a = a.zeros(tuple(out_shape))
+            out_shape[dim] = 1
+            if out is None:
+                out_a = a.empty(tuple(out_shape), float_dtype(a.dtype))
+            else:
+                assert out.shape == tuple(out_shape), f"Output shape {out.shape}"
+                out_a = out
 
             threadsperblock = 1024
             blockspergrid = out_a.size
@@ -153,7 +170,9 @@ class CudaOps(TensorOps):
         return ret
 
     @staticmethod
-    def matrix_multiply(a: Tensor, b: Tensor) -> Tensor:  # noqa: D102
+    def matrix_multiply(  # noqa: D102
+        a: Tensor, b: Tensor, out: Optional[Tensor] = None
+    ) -> Tensor:
         # Make these always be a 3 dimensional multiply
         both_2d = 0
         if len(a.shape) == 2:
@@ -168,7 +187,21 @@ class CudaOps(TensorOps):
         ls.append(a.shape[-2])
         ls.append(b.shape[-1])
         assert a.shape[-1] == b.shape[-2]
-        out = a.zeros(tuple(ls))
+        given = out
+        if out is None:
+            out = a.empty(tuple(ls), float_dtype(np.promote_types(a.dtype, b.dtype)))
+        else:
+            expected = tuple(ls[1:]) if both_2d else tuple(ls)
+            assert out.shape == expected, f"Output shape {out.shape} != {expected}"
+            if both_2d:
+                out = out._new(
+                    TensorData(
+                        out._tensor._storage,
+                        (1,) + out.shape,
+                        (0,) + out._tensor.strides,
+                        offset=out._tensor.offset,
+                    )
+                )
 
         # One block per batch, extra rows, extra col
         blockspergrid = (
@@ -182,6 +215,8 @@ class CudaOps(TensorOps):
             *out.tuple(), out.size, *a.tuple(), *b.tuple()
         )
 
+        if given is not None:
+            return given
         # Undo 3d if we added it.
         if both_2d:
             out = out.view(out.shape[1], out.shape[2])
@@ -356,7 +391,7 @@ def sum_practice(a: Tensor) -> TensorData:
     out = TensorData([0.0 for i in range(2)], (2,))
     out.to_cuda_()
     jit_sum_practice[blockspergrid, threadsperblock](
-        out.tuple()[0], a._tensor._storage, size
+        out.tuple()[0], a._tensor.tuple()[0], size
     )
     return out
 
@@ -525,7 +560,7 @@ def mm_practice(a: Tensor, b: Tensor) -> TensorData:
     out = TensorData([0.0 for i in range(size * size)], (size, size))
     out.to_cuda_()
     jit_mm_practice[blockspergrid, threadsperblock](
-        out.tuple()[0], a._tensor._storage, b._tensor._storage, size
+        out.tuple()[0], a._tensor.tuple()[0], b._tensor.tuple()[0], size
     )
     return out
 
@@ -1,24 +1,55 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, TypeVar, Any
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Set, Tuple, TypeVar
 
 import numpy as np
-from numba import prange  # type: ignore
+from numba import get_num_threads, prange  # type: ignore
+from numba import set_num_threads as _set_num_threads  # type: ignore
 from numba import njit as _njit  # type: ignore
+from numba.core.caching import FunctionCache  # type: ignore
+from numba.core.dispatcher import Dispatcher  # type: ignore
 
+# `numba.get_num_threads` reads the runtime through a ctypes pointer, which
+# numba refuses to cache; inside kernels, use the intrinsic that links the
+# same runtime symbol by name.
+from numba.np.ufunc.parallel import _iget_num_threads  # type: ignore
+
+from . import operators
 from .tensor_data import (
+    TensorData,
     broadcast_index,
+    broadcast_strides,
+    coalesce_dims,
+    float_dtype,
     index_to_position,
     shape_broadcast,
     to_index,
 )
-from .tensor_ops import MapProto, TensorOps
+from .tensor_ops import (
+    BACKEND_OPERATORS,
+    MapProto,
+    ReduceProto,
+    TensorOps,
+    ZipProto,
+)
 
 if TYPE_CHECKING:
-    from typing import Callable, Optional
+    from typing import Callable, Optional, Sequence
+
+    import numpy.typing as npt
 
+    from .fusion import Expr
     from .tensor import Tensor
-    from .tensor_data import Shape, Storage, Strides
+    from .tensor_ops import TensorBackend
+    from .tensor_data import Shape, Storage, Strides, UserShape, UserStrides
 
 # TIP: Use `NUMBA_DISABLE_JIT=1 pytest tests/ -m task3_1` to run these tests without JIT.
 
@@ -53,65 +84,542 @@ def njit(fn: Fn, **kwargs: Any) -> Fn:
     return _njit(inline="always", **kwargs)(fn)  # type: ignore
 
 
+def _global_names(code: types.CodeType) -> Set[str]:
+    """Names `code` and the code nested in it may read as globals."""
+    names = set(code.co_names)
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            names |= _global_names(c)
+    return names
+
+
+def _file_stamp(path: str) -> Any:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (path, st.st_mtime, st.st_size)
+
+
+def _stable_key(value: Any, seen: Set[int]) -> Any:
+    """Picklable key of a value a kernel reads, stable across processes.
+
+    Functions are keyed by their code, the stamp of their source file, the
+    values of their closure cells and of the globals they read, which numba
+    freezes into the compiled code as constants.
+    """
+    if isinstance(value, Dispatcher):
+        value = value.py_func
+    if isinstance(value, types.FunctionType):
+        if id(value) in seen:
+            return value.__qualname__
+        seen.add(id(value))
+        code = value.__code__
+        return (
+            value.__qualname__,
+            _stable_key(code, seen),
+            _file_stamp(code.co_filename),
+            tuple(_stable_key(c.cell_contents, seen) for c in value.__closure__ or ()),
+            tuple(
+                (name, _stable_key(value.__globals__[name], seen))
+                for name in sorted(_global_names(code))
+                if name in value.__globals__
+            ),
+        )
+    if isinstance(value, types.CodeType):
+        return (
+            value.co_code,
+            value.co_names,
+            tuple(_stable_key(c, seen) for c in value.co_consts),
+        )
+    if isinstance(value, types.ModuleType):
+        return value.__name__
+    if isinstance(value, type):
+        return (value.__module__, value.__qualname__)
+    if type(value).__module__.startswith("numba."):
+        # Intrinsics and the like pickle with a per-process id.
+        name = getattr(value, "__name__", None) or getattr(value, "_name", None)
+        return (type(value).__qualname__, name)
+    return value
+
+
+class KernelCache(FunctionCache):
+    """On-disk cache of compiled kernels.
+
+    Numba's own cache keys closures by pickling their cells, and a captured
+    dispatcher pickles with a per-process id, so kernels built by
+    `tensor_map(fn)` and friends would never be found again. Here the
+    kernel is keyed by `_stable_key` instead, which covers the code of the
+    scalar function, its source file and the globals it reads. So the entry
+    for a kernel is identified by its operator, its signature, whether it is
+    the parallel or the serial twin and (through the index file) the numba
+    version. Kernels reading a value that cannot be pickled are not cached.
+    """
+
+    def __init__(self, py_func: Callable[..., Any], parallel: bool = True):
+        super().__init__(py_func)
+        self._parallel = parallel
+
+    def _digest(self) -> Optional[str]:
+        # Computed when the kernel compiles, so with the values it freezes.
+        try:
+            key = pickle.dumps(_stable_key(self._py_func, set()))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        return hashlib.sha256(key).hexdigest()
+
+    def _index_key(self, sig: Any, codegen: Any) -> Any:
+        return (sig, codegen.magic_tuple(), self._parallel, self._digest())
+
+    def load_overload(self, sig: Any, target_context: Any) -> Any:  # noqa: D102
+        if self._digest() is None:
+            return None
+        return super().load_overload(sig, target_context)
+
+    def save_overload(self, sig: Any, data: Any) -> None:  # noqa: D102
+        if self._digest() is not None:
+            super().save_overload(sig, data)
+
+
+def kernel(fn: Fn, parallel: bool = True) -> Fn:
+    """Compile a kernel, cached on disk across processes.
+
+    Args:
+    ----
+        fn: low-level kernel, possibly closing over jitted scalar functions.
+        parallel: run `prange` loops on the thread pool; otherwise build the
+            serial twin, where they are plain loops.
+
+    Returns:
+    -------
+        Numba dispatcher for `fn` using `KernelCache`, or no cache when the
+        environment sets `MINITORCH_KERNEL_CACHE=0`. Kernels loaded from the
+        cache carry no parfor metadata, so `parallel_diagnostics` needs it off.
+
+    """
+    k = _njit(parallel=parallel)(fn)
+    if os.environ.get("MINITORCH_KERNEL_CACHE", "1") != "0":
+        k._cache = KernelCache(fn, parallel)
+    return k  # type: ignore
+
+
+def twins(factory: Callable[..., Fn], *args: Any) -> Tuple[Fn, Fn]:
+    """Serial and parallel kernels built by `factory(*args)`.
+
+    Args:
+    ----
+        factory: kernel factory taking a `parallel` flag, e.g. `tensor_map`.
+        *args: arguments of the factory.
+
+    Returns:
+    -------
+        The pair `(serial, parallel)`, so that `kernels[parallel]` picks one.
+
+    """
+    return factory(*args, parallel=False), factory(*args, parallel=True)
+
+
 to_index = njit(to_index)
 index_to_position = njit(index_to_position)
 broadcast_index = njit(broadcast_index)
+broadcast_strides = njit(broadcast_strides)
+
+# Blocking parameters for the tiled matrix multiply. `a` is packed into
+# MM_MC x MM_KC panels and `b` into MM_KC x MM_NC panels so that both stay
+# resident in cache, and the micro-kernel accumulates an MM_MR x MM_NR
+# register tile of `out` per pass over the shared dimension.
+MM_MR = 4
+MM_NR = 8
+MM_MC = 64
+MM_KC = 256
+MM_NC = 512
+
+# Problems with at least this many multiply-adds (M * N * K) per batch use
+# the tiled kernel; below it the packing overhead is not worth paying.
+MM_TILED_THRESHOLD = 64 * 64 * 64
+
+# Minimum number of elements each chunk of a split reduction reduces.
+REDUCE_SPLIT_MIN = 4096
+
+# Calls touching fewer elements than this run the serial twin of their
+# kernel, since waking the thread pool would cost more than it saves.
+# None calibrates it on first use for the current thread count, see
+# `calibrate_serial_threshold`.
+SERIAL_THRESHOLD: Optional[int] = None
+_calibrated_thresholds: Dict[int, int] = {}
+
+# Start numba's threading layer from the importing thread. Started first
+# from another thread, such as `TensorBackend.warmup`, TBB hangs the
+# interpreter at exit.
+get_num_threads()
+
+
+def serial_threshold() -> int:
+    """The current serial/parallel dispatch threshold, in elements."""
+    if SERIAL_THRESHOLD is not None:
+        return SERIAL_THRESHOLD
+    n_threads = get_num_threads()
+    if n_threads not in _calibrated_thresholds:
+        _calibrated_thresholds[n_threads] = calibrate_serial_threshold()
+    return _calibrated_thresholds[n_threads]
+
+
+# Twin chosen by `forced_dispatch` for the calling thread, if any.
+_forced = threading.local()
+
+
+def use_parallel(size: int) -> bool:
+    """Whether a call touching `size` elements should run in parallel."""
+    parallel = getattr(_forced, "parallel", None)
+    if parallel is not None:
+        return parallel
+    return size >= serial_threshold()
+
+
+@contextmanager
+def forced_dispatch(parallel: bool) -> Iterator[None]:
+    """Run the parallel or the serial twin of every kernel called in the block.
+
+    Only affects the calling thread.
+
+    Args:
+    ----
+        parallel: use the parallel twins, otherwise the serial ones.
+
+    """
+    previous = getattr(_forced, "parallel", None)
+    _forced.parallel = parallel
+    try:
+        yield
+    finally:
+        _forced.parallel = previous
+
+
+def calibrate_serial_threshold(repeats: int = 20) -> int:
+    """Measure the size above which parallel kernels win.
+
+    Times the parallel and serial twins of the linear identity map on one
+    element per thread, whose difference is the cost of a parallel launch,
+    and the serial twin on a large input for the cost per element. The
+    threshold is where splitting the work across threads saves as much as
+    the launch costs.
+
+    Args:
+    ----
+        repeats: timing repetitions, the fastest of which is used.
+
+    Returns:
+    -------
+        Threshold in elements.
+
+    """
+    n_threads = get_num_threads()
+    if n_threads == 1:
+        return sys.maxsize
+    serial, parallel = twins(tensor_map_linear, njit(operators.id))
+
+    def best(f: Callable[[Storage, Storage, int], None], x: Storage) -> float:
+        f(x, x, len(x))
+        elapsed = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            f(x, x, len(x))
+            elapsed = min(elapsed, time.perf_counter() - start)
+        return elapsed
+
+    small = np.zeros(n_threads)
+    large = np.zeros(1 << 16)
+    launch = max(best(parallel, small) - best(serial, small), 0.0)
+    per_element = max(best(serial, large) / len(large), 1e-12)
+    return int(launch / (per_element * (1.0 - 1.0 / n_threads)))
+
+
+def _matmul_partition(
+    batch: int, M: int, N: int, row_align: int, col_align: int
+) -> Tuple[int, int]:
+    """Choose the row and column block sizes for a batched matrix multiply.
+
+    Blocks are halved along whichever of the rows or columns is currently
+    longer until `batch * row_blocks * col_blocks` covers every thread, so
+    a single large 2-D product is spread across all cores while batched
+    products keep whole matrices per task.
+
+    Args:
+    ----
+        batch (int): number of matrices in the output
+        M (int): rows of each output matrix
+        N (int): columns of each output matrix
+        row_align (int): row block sizes are rounded up to a multiple of this
+        col_align (int): column block sizes are rounded up to a multiple of this
+
+    Returns:
+    -------
+        Tuple[int, int]: the row block size and the column block size
+
+    """
+    n_threads = _iget_num_threads()
+    row_blocks = 1
+    col_blocks = 1
+    while batch * row_blocks * col_blocks < n_threads:
+        rows = (M + row_blocks - 1) // row_blocks
+        cols = (N + col_blocks - 1) // col_blocks
+        if rows >= cols and rows >= 2 * row_align:
+            row_blocks *= 2
+        elif cols >= 2 * col_align:
+            col_blocks *= 2
+        elif rows >= 2 * row_align:
+            row_blocks *= 2
+        else:
+            break
+    row_block = (M + row_blocks - 1) // row_blocks
+    row_block = (row_block + row_align - 1) // row_align * row_align
+    col_block = (N + col_blocks - 1) // col_blocks
+    col_block = (col_block + col_align - 1) // col_align * col_align
+    return max(row_block, 1), max(col_block, 1)
+
+
+matmul_partition = njit(_matmul_partition)
 
 
 class FastOps(TensorOps):
     @staticmethod
-    def map(fn: Callable[[float], float]) -> MapProto:
-        """See `tensor_ops.py`"""
+    def map(fn: Callable[[float], float], keep_dtype: bool = False) -> MapProto:
+        """See `tensor_ops.py`
+
+        Each kernel has a serial twin, used for inputs below
+        `serial_threshold()` elements.
+        """
         # This line JIT compiles your tensor_map
-        f = tensor_map(njit(fn))
+        jfn = njit(fn)
+        f = twins(tensor_map, jfn)
+        f_linear = twins(tensor_map_linear, jfn)
 
         def ret(a: Tensor, out: Optional[Tensor] = None) -> Tensor:
             if out is None:
-                out = a.zeros(a.shape)
-            f(*out.tuple(), *a.tuple())
+                out = a.empty(a.shape, None if keep_dtype else float_dtype(a.dtype))
+            shape, (out_strides, in_strides) = _coalesced(out.shape, out, a)
+            out_storage, in_storage = out.tuple()[0], a.tuple()[0]
+            par = use_parallel(out.size)
+            if len(shape) == 1 and out_strides == in_strides == (1,):
+                f_linear[par](out_storage, in_storage, out.size)
+            else:
+                ashape = np.array(shape)
+                f[par](
+                    out_storage,
+                    ashape,
+                    np.array(out_strides),
+                    in_storage,
+                    ashape,
+                    np.array(in_strides),
+                )
             return out
 
         return ret
 
     @staticmethod
-    def zip(fn: Callable[[float, float], float]) -> Callable[[Tensor, Tensor], Tensor]:
-        """See `tensor_ops.py`"""
-        f = tensor_zip(njit(fn))
+    def zip(
+        fn: Callable[[float, float], float], out_dtype: Optional[npt.DTypeLike] = None
+    ) -> ZipProto:
+        """See `tensor_ops.py`
+
+        Besides the general broadcasting kernel, dedicated linear-index
+        kernels handle row-major operands that have the same shape, where
+        one side is a single value, or where one side is a row broadcast
+        along the leading dimensions. Cases are detected after coalescing.
+        Each kernel has a serial twin, used for outputs below
+        `serial_threshold()` elements.
+        """
+        jfn = njit(fn)
+        f = twins(tensor_zip, jfn)
+        f_linear = twins(tensor_zip_linear, jfn)
+        f_scalar = twins(tensor_zip_scalar, jfn)
+        f_row = twins(tensor_zip_row, jfn)
 
-        def ret(a: Tensor, b: Tensor) -> Tensor:
+        def ret(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
             c_shape = shape_broadcast(a.shape, b.shape)
-            out = a.zeros(c_shape)
-            f(*out.tuple(), *a.tuple(), *b.tuple())
+            if out is None:
+                if out_dtype is None:
+                    dtype = float_dtype(np.promote_types(a.dtype, b.dtype))
+                else:
+                    dtype = np.dtype(out_dtype)
+                out = a.empty(c_shape, dtype)
+            assert out.shape == c_shape, f"Output shape {out.shape} != {c_shape}"
+            shape, (out_strides, a_strides, b_strides) = _coalesced(c_shape, out, a, b)
+            out_storage, a_storage, b_storage = (
+                out.tuple()[0],
+                a.tuple()[0],
+                b.tuple()[0],
+            )
+            par = use_parallel(out.size)
+            if len(shape) == 1 and out_strides == (1,):
+                if a_strides == b_strides == (1,):
+                    f_linear[par](out_storage, a_storage, b_storage, out.size)
+                    return out
+                if a_strides == (1,) and b_strides == (0,):
+                    f_scalar[par](out_storage, a_storage, b_storage, out.size, True)
+                    return out
+                if a_strides == (0,) and b_strides == (1,):
+                    f_scalar[par](out_storage, b_storage, a_storage, out.size, False)
+                    return out
+            if len(shape) == 2 and out_strides == (shape[1], 1):
+                rows, cols = shape
+                if a_strides == out_strides and b_strides == (0, 1):
+                    f_row[par](out_storage, a_storage, b_storage, rows, cols, True)
+                    return out
+                if a_strides == (0, 1) and b_strides == out_strides:
+                    f_row[par](out_storage, b_storage, a_storage, rows, cols, False)
+                    return out
+            ashape = np.array(shape)
+            f[par](
+                out_storage,
+                ashape,
+                np.array(out_strides),
+                a_storage,
+                ashape,
+                np.array(a_strides),
+                b_storage,
+                ashape,
+                np.array(b_strides),
+            )
             return out
 
         return ret
 
     @staticmethod
-    def reduce(
-        fn: Callable[[float, float], float], start: float = 0.0
-    ) -> Callable[[Tensor, int], Tensor]:
-        """See `tensor_ops.py`"""
-        f = tensor_reduce(njit(fn))
+    def reduce(fn: Callable[[float, float], float], start: float = 0.0) -> ReduceProto:
+        """See `tensor_ops.py`
+
+        Dimensions on either side of the reduced one are coalesced first.
+        When there are fewer outputs than threads, the reduced dimension is
+        split into chunks that are reduced in parallel and then combined,
+        so `start` must be the identity of `fn`. Inputs below
+        `serial_threshold()` elements use the serial twin of the kernel.
+        """
+        jfn = njit(fn)
+        f = twins(tensor_reduce, jfn)
+        f_split = tensor_reduce_split(jfn)
 
-        def ret(a: Tensor, dim: int) -> Tensor:
+        def ret(a: Tensor, dim: int, out: Optional[Tensor] = None) -> Tensor:
             out_shape = list(a.shape)
             out_shape[dim] = 1
 
             # Other values when not sum.
-            out = a.zeros(tuple(out_shape))
-            out._tensor._storage[:] = start
+            if out is None:
+                out = a.empty(tuple(out_shape), float_dtype(a.dtype))
+                out._tensor._storage[:] = start
+            else:
+                assert out.shape == tuple(out_shape), f"Output shape {out.shape}"
+                out.fill_(start)
+
+            # Coalesce the dims before and after `dim` separately.
+            a_strides, o_strides = a._tensor.strides, out._tensor.strides
+            pre, (o_pre, a_pre) = coalesce_dims(
+                a.shape[:dim], [o_strides[:dim], a_strides[:dim]]
+            )
+            post, (o_post, a_post) = coalesce_dims(
+                a.shape[dim + 1 :], [o_strides[dim + 1 :], a_strides[dim + 1 :]]
+            )
+            reduce_dim = len(pre)
+            args = (
+                out.tuple()[0],
+                np.array(pre + (1,) + post),
+                np.array(o_pre + (o_strides[dim],) + o_post),
+                a.tuple()[0],
+                np.array(pre + (a.shape[dim],) + post),
+                np.array(a_pre + (a_strides[dim],) + a_post),
+                reduce_dim,
+            )
+
+            if not use_parallel(a.size):
+                f[False](*args)
+                return out
+            n_chunks = reduce_chunks(out.size, a.shape[dim])
+            if n_chunks > 1:
+                f_split(*args, n_chunks)
+            else:
+                f[True](*args)
+            return out
+
+        return ret
 
-            f(*out.tuple(), *a.tuple(), dim)
+    @staticmethod
+    def nzip(expr: Expr) -> Callable[..., Tensor]:
+        """See `tensor_ops.py`
+
+        The whole expression is compiled into one kernel, so every input
+        and the output are read or written exactly once per element.
+        """
+        f = twins(tensor_nzip, expr.build(njit))
+
+        def ret(*vals: Tensor) -> Tensor:
+            c_shape = vals[0].shape
+            for v in vals[1:]:
+                c_shape = shape_broadcast(c_shape, v.shape)
+            dtype = float_dtype(np.result_type(*[v.dtype for v in vals]))
+            out = vals[0].empty(c_shape, dtype)
+            shape, strides = _coalesced(c_shape, out, *vals)
+            # The kernel indexes the storages by a loop variable, so they
+            # must share one dtype for numba to type the tuple.
+            f[use_parallel(out.size)](
+                out.tuple()[0],
+                np.array(shape),
+                np.array(strides),
+                tuple(v.tuple()[0].astype(dtype, copy=False) for v in vals),
+            )
             return out
 
         return ret
 
+    @staticmethod
+    def set_num_threads(n: int) -> None:
+        """See `tensor_ops.py`"""
+        _set_num_threads(n)
+
+    @staticmethod
+    def get_num_threads() -> int:
+        """See `tensor_ops.py`"""
+        return get_num_threads()
+
+    @staticmethod
+    def warmup(
+        backend: TensorBackend,
+        names: Sequence[str],
+        shape: Tuple[int, ...],
+        dtype: npt.DTypeLike,
+    ) -> None:
+        """See `tensor_ops.py`
+
+        Runs with the serial and then the parallel twins forced, and adds
+        the inputs that reach the tiled matrix multiply and the split
+        reduction, whatever `shape` is. Also calibrates `serial_threshold`,
+        which real calls would otherwise do on first use.
+        """
+        from .tensor import Tensor
+
+        def make(shape: Tuple[int, ...]) -> Tensor:
+            size = int(np.prod(shape))
+            return Tensor.make([1.0] * size, shape, backend=backend, dtype=dtype)
+
+        # Long enough to split in two chunks, and a product big enough to tile.
+        long = make((2 * REDUCE_SPLIT_MIN,))
+        k = -(-MM_TILED_THRESHOLD // 256)
+        a, b = make((16, k)), make((k, 16))
+        serial_threshold()
+        for parallel in (False, True):
+            with forced_dispatch(parallel):
+                TensorOps.warmup(backend, names, shape, dtype)
+                for name in names:
+                    if name == "matrix_multiply":
+                        backend.matrix_multiply(a, b)
+                    elif BACKEND_OPERATORS[name][0] == "reduce":
+                        getattr(backend, name)(long, 0)
+
     @staticmethod
     def mul_reduce(a: Tensor, dim: int) -> Tensor:  # noqa: D102
         return FastOps.reduce(operators.mul, start=1.0)(a, dim)  # type: ignore # noqa: F821
 
     @staticmethod
-    def matrix_multiply(a: Tensor, b: Tensor) -> Tensor:
+    def matrix_multiply(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
         """Batched tensor matrix multiply ::
 
             for n:
@@ -130,6 +638,8 @@ class FastOps(TensorOps):
         ----
             a : tensor data a
             b : tensor data b
+            out : optional tensor data to fill in, of the output shape and
+                not sharing storage with `a` or `b`
 
         Returns:
         -------
@@ -150,14 +660,63 @@ class FastOps(TensorOps):
         ls.append(a.shape[-2])
         ls.append(b.shape[-1])
         assert a.shape[-1] == b.shape[-2]
-        out = a.zeros(tuple(ls))
-
-        tensor_matrix_multiply(*out.tuple(), *a.tuple(), *b.tuple())
+        tiled = a.shape[-2] * b.shape[-1] * a.shape[-1] >= MM_TILED_THRESHOLD
+        if out is None:
+            # The tiled kernel accumulates into `out`.
+            alloc = a.zeros if tiled else a.empty
+            out3 = alloc(tuple(ls), float_dtype(np.promote_types(a.dtype, b.dtype)))
+        else:
+            expected = tuple(ls[1:]) if both_2d else tuple(ls)
+            assert out.shape == expected, f"Output shape {out.shape} != {expected}"
+            if tiled:
+                # The tiled kernel accumulates into `out`.
+                out.fill_(0.0)
+            out3 = out
+            if both_2d:
+                # Add a size-1 batch dim without requiring `out` to be contiguous.
+                out3 = out._new(
+                    TensorData(
+                        out._tensor._storage,
+                        (1,) + out.shape,
+                        (0,) + out._tensor.strides,
+                        offset=out._tensor.offset,
+                    )
+                )
+
+        # Dispatch on the number of multiply-adds rather than outputs.
+        if use_parallel(out3.size * a.shape[-1]):
+            kernels = tensor_matrix_multiply, tensor_matrix_multiply_tiled
+        else:
+            kernels = tensor_matrix_multiply_serial, tensor_matrix_multiply_tiled_serial
+        kernels[tiled](*out3.tuple(), *a.tuple(), *b.tuple())
 
+        if out is not None:
+            return out
         # Undo 3d if we added it.
         if both_2d:
-            out = out.view(out.shape[1], out.shape[2])
-        return out
+            out3 = out3.view(out3.shape[1], out3.shape[2])
+        return out3
+
+
+def _coalesced(
+    shape: UserShape, *operands: Tensor
+) -> Tuple[UserShape, List[UserStrides]]:
+    """Coalesce `shape` and the broadcast strides of `operands` over it.
+
+    See `tensor_data.coalesce_dims`. A problem with a single element is
+    reported as shape `(1,)` with unit strides.
+    """
+    strides = []
+    for t in operands:
+        lead = (0,) * (len(shape) - t.dims)
+        strides.append(
+            lead
+            + tuple(st if s > 1 else 0 for s, st in zip(t.shape, t._tensor.strides))
+        )
+    new_shape, new_strides = coalesce_dims(shape, strides)
+    if not new_shape:
+        return (1,), [(1,)] * len(operands)
+    return new_shape, new_strides
 
 
 # Implementations
@@ -165,18 +724,22 @@ class FastOps(TensorOps):
 
 def tensor_map(
     fn: Callable[[float], float],
+    parallel: bool = True,
 ) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides], None]:
     """NUMBA low_level tensor_map function. See `tensor_ops.py` for description.
 
     Optimizations:
 
-    * Main loop in parallel
-    * All indices use numpy buffers
-    * When `out` and `in` are stride-aligned, avoid indexing
+    * Main loop in parallel, one contiguous chunk of `out` per thread
+    * Each chunk decodes its starting index once and then advances the
+      index odometer-style, updating positions by strides
+    * No heap allocation per element
 
     Args:
     ----
         fn: function mappings floats-to-floats to apply.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
 
     Returns:
     -------
@@ -192,30 +755,52 @@ def tensor_map(
         in_shape: Shape,
         in_strides: Strides,
     ) -> None:
-        # TODO: Implement for Task 3.1.
-        size = np.prod(out_shape)
-
-        if np.array_equal(out_shape, in_shape) and np.array_equal(
-            out_strides, in_strides
-        ):
-            # Stride-aligned, avoid indexing
-            for i in prange(size):
-                out[i] = fn(float(in_storage[i]))
-        else:
-            for i in prange(size):
-                out_index = np.empty(len(out_shape), dtype=np.int32)
-                in_index = np.empty(len(in_shape), dtype=np.int32)
-                to_index(i, out_shape, out_index)
-                broadcast_index(out_index, out_shape, in_shape, in_index)
-                out_pos = index_to_position(out_index, out_strides)
-                in_pos = index_to_position(in_index, in_strides)
-                out[out_pos] = fn(in_storage[in_pos])
-
-    return njit(_map, parallel=True)  # type: ignore
+        dims = len(out_shape)
+        size = 1
+        for d in range(dims):
+            size *= out_shape[d]
+
+        in_bstrides = broadcast_strides(out_shape, in_shape, in_strides)
+        n_chunks = max(1, min(size, _iget_num_threads()))
+        chunk = (size + n_chunks - 1) // n_chunks
+        for c in prange(n_chunks):
+            start = c * chunk
+            end = min(size, start + chunk)
+            if start < end:
+                # Decode the starting index of the chunk once.
+                out_index = np.zeros_like(out_shape)
+                out_pos = 0
+                in_pos = 0
+                rem = start + 0
+                for d in range(dims - 1, -1, -1):
+                    idx = rem % out_shape[d]
+                    rem = rem // out_shape[d]
+                    out_index[d] = idx
+                    out_pos += idx * out_strides[d]
+                    in_pos += idx * in_bstrides[d]
+
+                for _ in range(end - start):
+                    out[out_pos] = fn(in_storage[in_pos])
+
+                    # Advance the index by one, carrying into outer dims.
+                    d = dims - 1
+                    while d >= 0:
+                        out_index[d] += 1
+                        out_pos += out_strides[d]
+                        in_pos += in_bstrides[d]
+                        if out_index[d] < out_shape[d]:
+                            break
+                        out_pos -= out_shape[d] * out_strides[d]
+                        in_pos -= out_shape[d] * in_bstrides[d]
+                        out_index[d] = 0
+                        d -= 1
+
+    return kernel(_map, parallel)
 
 
 def tensor_zip(
     fn: Callable[[float, float], float],
+    parallel: bool = True,
 ) -> Callable[
     [Storage, Shape, Strides, Storage, Shape, Strides, Storage, Shape, Strides], None
 ]:
@@ -223,13 +808,16 @@ def tensor_zip(
 
     Optimizations:
 
-    * Main loop in parallel
-    * All indices use numpy buffers
-    * When `out`, `a`, `b` are stride-aligned, avoid indexing
+    * Main loop in parallel, one contiguous chunk of `out` per thread
+    * Each chunk decodes its starting index once and then advances the
+      index odometer-style, updating positions by strides
+    * No heap allocation per element
 
     Args:
     ----
         fn: function maps two floats to float to apply.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
 
     Returns:
     -------
@@ -248,49 +836,290 @@ def tensor_zip(
         b_shape: Shape,
         b_strides: Strides,
     ) -> None:
-        # TODO: Implement for Task 3.1.
-        size = np.prod(out_shape)  # Total elements in output
-        # if (np.array_equal(out_shape, a_shape)
-        #     and np.array_equal(a_shape, b_shape)
-        #     and np.array_equal(out_strides, a_strides)
-        #     and np.array_equal(a_strides, b_strides)
-        # ):
-        #     # Stride-aligned case
-        #     for i in prange(size):
-        #         out[i] = fn(float(a_storage[i]), float(b_storage[i]))
-        # else:
+        dims = len(out_shape)
+        size = 1
+        for d in range(dims):
+            size *= out_shape[d]
+
+        a_bstrides = broadcast_strides(out_shape, a_shape, a_strides)
+        b_bstrides = broadcast_strides(out_shape, b_shape, b_strides)
+        n_chunks = max(1, min(size, _iget_num_threads()))
+        chunk = (size + n_chunks - 1) // n_chunks
+        for c in prange(n_chunks):
+            start = c * chunk
+            end = min(size, start + chunk)
+            if start < end:
+                # Decode the starting index of the chunk once.
+                out_index = np.zeros_like(out_shape)
+                out_pos = 0
+                a_pos = 0
+                b_pos = 0
+                rem = start + 0
+                for d in range(dims - 1, -1, -1):
+                    idx = rem % out_shape[d]
+                    rem = rem // out_shape[d]
+                    out_index[d] = idx
+                    out_pos += idx * out_strides[d]
+                    a_pos += idx * a_bstrides[d]
+                    b_pos += idx * b_bstrides[d]
+
+                for _ in range(end - start):
+                    out[out_pos] = fn(a_storage[a_pos], b_storage[b_pos])
+
+                    # Advance the index by one, carrying into outer dims.
+                    d = dims - 1
+                    while d >= 0:
+                        out_index[d] += 1
+                        out_pos += out_strides[d]
+                        a_pos += a_bstrides[d]
+                        b_pos += b_bstrides[d]
+                        if out_index[d] < out_shape[d]:
+                            break
+                        out_pos -= out_shape[d] * out_strides[d]
+                        a_pos -= out_shape[d] * a_bstrides[d]
+                        b_pos -= out_shape[d] * b_bstrides[d]
+                        out_index[d] = 0
+                        d -= 1
+
+    return kernel(_zip, parallel)
+
+
+def tensor_nzip(
+    fn: Callable[[Storage], float],
+    parallel: bool = True,
+) -> Callable[[Storage, Shape, Strides, Tuple[Storage, ...]], None]:
+    """NUMBA higher-order n-ary tensor zip function. See `tensor_ops.py` for description.
+
+    Takes the output storage and shape, a `(1 + n) x dims` array of strides
+    aligned to the output shape (row 0 for `out`, then one row per input,
+    0 along broadcast dims) and a tuple of the `n` input storages.
+
+    Optimizations:
+
+    * Main loop in parallel, one contiguous chunk of `out` per thread
+    * Each chunk decodes its starting index once and then advances the
+      index odometer-style, updating positions by strides
+    * No heap allocation per element
+
+    Args:
+    ----
+        fn: function mapping the array of input values to a float.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
+
+    Returns:
+    -------
+        Tensor n-ary zip function.
+
+    """
+
+    def _nzip(
+        out: Storage,
+        out_shape: Shape,
+        strides: Strides,
+        storages: Tuple[Storage, ...],
+    ) -> None:
+        n = len(storages)
+        dims = len(out_shape)
+        size = 1
+        for d in range(dims):
+            size *= out_shape[d]
+
+        n_chunks = max(1, min(size, _iget_num_threads()))
+        chunk = (size + n_chunks - 1) // n_chunks
+        for c in prange(n_chunks):
+            start = c * chunk
+            end = min(size, start + chunk)
+            if start < end:
+                # Decode the starting index of the chunk once.
+                out_index = np.zeros_like(out_shape)
+                pos = np.zeros(n + 1, dtype=np.int64)
+                vals = np.empty(n, dtype=out.dtype)
+                rem = start + 0
+                for d in range(dims - 1, -1, -1):
+                    idx = rem % out_shape[d]
+                    rem = rem // out_shape[d]
+                    out_index[d] = idx
+                    for k in range(n + 1):
+                        pos[k] += idx * strides[k, d]
+
+                for _ in range(end - start):
+                    for k in range(n):
+                        vals[k] = storages[k][pos[k + 1]]
+                    out[pos[0]] = fn(vals)
+
+                    # Advance the index by one, carrying into outer dims.
+                    d = dims - 1
+                    while d >= 0:
+                        out_index[d] += 1
+                        for k in range(n + 1):
+                            pos[k] += strides[k, d]
+                        if out_index[d] < out_shape[d]:
+                            break
+                        for k in range(n + 1):
+                            pos[k] -= out_shape[d] * strides[k, d]
+                        out_index[d] = 0
+                        d -= 1
+
+    return kernel(_nzip, parallel)
+
+
+def tensor_map_linear(
+    fn: Callable[[float], float],
+    parallel: bool = True,
+) -> Callable[[Storage, Storage, int], None]:
+    """NUMBA tensor map over row-major `out` and `in` of the same shape.
+
+    Args:
+    ----
+        fn: function mappings floats-to-floats to apply.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
+
+    Returns:
+    -------
+        Map function taking `out`, `in` storage and the element count.
+
+    """
+
+    def _map_linear(out: Storage, in_storage: Storage, size: int) -> None:
+        for i in prange(size):
+            out[i] = fn(in_storage[i])
+
+    return kernel(_map_linear, parallel)
+
+
+def tensor_zip_linear(
+    fn: Callable[[float, float], float],
+    parallel: bool = True,
+) -> Callable[[Storage, Storage, Storage, int], None]:
+    """NUMBA tensor zip over row-major `out`, `a` and `b` of the same shape.
+
+    Args:
+    ----
+        fn: function maps two floats to float to apply.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
+
+    Returns:
+    -------
+        Zip function taking `out`, `a`, `b` storage and the element count.
+
+    """
+
+    def _zip_linear(
+        out: Storage, a_storage: Storage, b_storage: Storage, size: int
+    ) -> None:
         for i in prange(size):
-            out_index = np.empty(len(out_shape), dtype=np.int32)
-            a_index = np.empty(len(a_shape), dtype=np.int32)
-            b_index = np.empty(len(b_shape), dtype=np.int32)
+            out[i] = fn(a_storage[i], b_storage[i])
+
+    return kernel(_zip_linear, parallel)
+
+
+def tensor_zip_scalar(
+    fn: Callable[[float, float], float],
+    parallel: bool = True,
+) -> Callable[[Storage, Storage, Storage, int, bool], None]:
+    """NUMBA tensor zip of a row-major tensor with a single value.
+
+    `t_storage` has the same shape as `out` and `v_storage` holds one
+    value. With `v_second` the value is passed as the second argument of
+    `fn`, otherwise as the first.
+
+    Args:
+    ----
+        fn: function maps two floats to float to apply.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
+
+    Returns:
+    -------
+        Zip function taking `out`, tensor and value storage, the element
+        count and `v_second`.
+
+    """
+
+    def _zip_scalar(
+        out: Storage,
+        t_storage: Storage,
+        v_storage: Storage,
+        size: int,
+        v_second: bool,
+    ) -> None:
+        v = v_storage[0]
+        if v_second:
+            for i in prange(size):
+                out[i] = fn(t_storage[i], v)
+        else:
+            for i in prange(size):
+                out[i] = fn(v, t_storage[i])
 
-            to_index(i, out_shape, out_index)
-            broadcast_index(out_index, out_shape, a_shape, a_index)
-            broadcast_index(out_index, out_shape, b_shape, b_index)
+    return kernel(_zip_scalar, parallel)
 
-            out_pos = index_to_position(out_index, out_strides)
-            a_pos = index_to_position(a_index, a_strides)
-            b_pos = index_to_position(b_index, b_strides)
 
-            out[out_pos] = fn(a_storage[a_pos], b_storage[b_pos])
+def tensor_zip_row(
+    fn: Callable[[float, float], float],
+    parallel: bool = True,
+) -> Callable[[Storage, Storage, Storage, int, int, bool], None]:
+    """NUMBA tensor zip of a row-major tensor with a broadcast row.
+
+    `t_storage` has the shape of `out`, viewed as `rows x cols`, and
+    `r_storage` holds `cols` values repeated along every row. With
+    `r_second` the row is passed as the second argument of `fn`, otherwise
+    as the first.
+
+    Args:
+    ----
+        fn: function maps two floats to float to apply.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
+
+    Returns:
+    -------
+        Zip function taking `out`, tensor and row storage, the row and
+        column counts and `r_second`.
 
-    return njit(_zip, parallel=True)  # type: ignore
+    """
+
+    def _zip_row(
+        out: Storage,
+        t_storage: Storage,
+        r_storage: Storage,
+        rows: int,
+        cols: int,
+        r_second: bool,
+    ) -> None:
+        for r in prange(rows):
+            base = r * cols
+            if r_second:
+                for c in range(cols):
+                    out[base + c] = fn(t_storage[base + c], r_storage[c])
+            else:
+                for c in range(cols):
+                    out[base + c] = fn(r_storage[c], t_storage[base + c])
+
+    return kernel(_zip_row, parallel)
 
 
 def tensor_reduce(
     fn: Callable[[float, float], float],
+    parallel: bool = True,
 ) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides, int], None]:
     """NUMBA higher-order tensor reduce function. See `tensor_ops.py` for description.
 
     Optimizations:
 
-    * Main loop in parallel
-    * All indices use numpy buffers
+    * Main loop in parallel over output positions
+    * Base positions decoded once per output, without index buffers
+    * Inner loop walks the reduced dimension by a constant stride, with a
+      dedicated unit-stride path when it is the innermost contiguous one
     * Inner-loop should not call any functions or write non-local variables
 
     Args:
     ----
         fn: reduction function mapping two floats to float.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
 
     Returns:
     -------
@@ -307,31 +1136,145 @@ def tensor_reduce(
         a_strides: Strides,
         reduce_dim: int,
     ) -> None:
-        # TODO: Implement for Task 3.1.
-        out_size = len(out)
-        out_index = np.zeros(len(out_shape), dtype=np.int32)
-        a_index = np.zeros(len(a_shape), dtype=np.int32)
-
-        for i in range(out_size):
-            # Get the index into 'out'
-            to_index(i, out_shape, out_index)
-            out_pos = index_to_position(out_index, out_strides)
+        out_size = 1
+        for d in range(len(out_shape)):
+            out_size *= out_shape[d]
+        reduce_size = a_shape[reduce_dim]
+        reduce_stride = a_strides[reduce_dim]
+
+        for i in prange(out_size):
+            # Decode the ordinal into base positions in `out` and `a`. The
+            # reduced dimension has size 1 in `out`, so it contributes 0.
+            out_pos = 0
+            a_pos = 0
+            rem = i + 0
+            for d in range(len(out_shape) - 1, -1, -1):
+                idx = rem % out_shape[d]
+                rem = rem // out_shape[d]
+                out_pos += idx * out_strides[d]
+                a_pos += idx * a_strides[d]
+
             # Initialize total with 'start' value from 'out[out_pos]'
             total = out[out_pos]
+            if reduce_stride == 1:
+                for s in range(reduce_size):
+                    total = fn(total, a_storage[a_pos + s])
+            else:
+                for s in range(reduce_size):
+                    total = fn(total, a_storage[a_pos])
+                    a_pos += reduce_stride
+            out[out_pos] = total
+
+    return kernel(_reduce, parallel)
+
+
+def reduce_chunks(out_size: int, reduce_size: int) -> int:
+    """Number of chunks to split each reduction into.
+
+    Reductions with at least one output per thread are already parallel
+    over outputs and use a single chunk. Otherwise the reduced dimension is
+    split so that roughly every thread gets a chunk, keeping at least
+    `REDUCE_SPLIT_MIN` elements per chunk.
+
+    Args:
+    ----
+        out_size (int): number of outputs of the reduction
+        reduce_size (int): length of the reduced dimension
+
+    Returns:
+    -------
+        int: chunks per output, 1 for an unsplit reduction
+
+    """
+    n_threads = get_num_threads()
+    if out_size >= n_threads:
+        return 1
+    wanted = (n_threads + out_size - 1) // out_size
+    return max(1, min(wanted, reduce_size // REDUCE_SPLIT_MIN))
+
+
+def tensor_reduce_split(
+    fn: Callable[[float, float], float],
+    parallel: bool = True,
+) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides, int, int], None]:
+    """NUMBA two-phase tensor reduce function for few outputs.
+
+    Same as `tensor_reduce`, with an extra `n_chunks` argument. The
+    reduced dimension of each output is cut into `n_chunks` chunks. The
+    first phase reduces every (output, chunk) pair in parallel into a
+    partial accumulator starting from the value in `out`, and the second
+    phase combines the partials of each output. The initial value of `out`
+    must therefore be the identity of `fn`.
+
+    Args:
+    ----
+        fn: reduction function mapping two floats to float.
+        parallel: compile the parallel kernel, or its serial twin for
+            small inputs.
 
-            # Iterate over the reduction dimension
-            for s in range(a_shape[reduce_dim]):
-                # Build 'a_index' from 'out_index', varying 'reduce_dim'
-                for dim in range(len(a_shape)):
-                    if dim == reduce_dim:
-                        a_index[dim] = s
-                    else:
-                        a_index[dim] = out_index[dim]
-                a_pos = index_to_position(a_index, a_strides)
-                total = fn(total, a_storage[a_pos])
+    Returns:
+    -------
+        Tensor reduce function
+
+    """
+
+    def _reduce_split(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        a_storage: Storage,
+        a_shape: Shape,
+        a_strides: Strides,
+        reduce_dim: int,
+        n_chunks: int,
+    ) -> None:
+        out_size = 1
+        for d in range(len(out_shape)):
+            out_size *= out_shape[d]
+        reduce_size = a_shape[reduce_dim]
+        reduce_stride = a_strides[reduce_dim]
+        chunk = (reduce_size + n_chunks - 1) // n_chunks
+        partials = np.empty(out_size * n_chunks, dtype=out.dtype)
+
+        # Phase 1: partial reductions over every (output, chunk) pair.
+        for task in prange(out_size * n_chunks):
+            out_pos = 0
+            a_pos = 0
+            rem = task // n_chunks
+            for d in range(len(out_shape) - 1, -1, -1):
+                idx = rem % out_shape[d]
+                rem = rem // out_shape[d]
+                out_pos += idx * out_strides[d]
+                a_pos += idx * a_strides[d]
+
+            s_start = (task % n_chunks) * chunk
+            s_end = min(reduce_size, s_start + chunk)
+            a_pos += s_start * reduce_stride
+            total = out[out_pos]
+            if reduce_stride == 1:
+                for s in range(s_end - s_start):
+                    total = fn(total, a_storage[a_pos + s])
+            else:
+                for s in range(s_end - s_start):
+                    total = fn(total, a_storage[a_pos])
+                    a_pos += reduce_stride
+            partials[task] = total
+
+        # Phase 2: combine the partials of each output.
+        for i in prange(out_size):
+            out_pos = 0
+            rem = i + 0
+            for d in range(len(out_shape) - 1, -1, -1):
+                idx = rem % out_shape[d]
+                rem = rem // out_shape[d]
+                out_pos += idx * out_strides[d]
+
+            total = out[out_pos]
+            for c in range(n_chunks):
+                total = fn(total, partials[i * n_chunks + c])
             out[out_pos] = total
 
-    return njit(_reduce, parallel=True)  # type: ignore
+    return kernel(_reduce_split, parallel)
 
 
 def _tensor_matrix_multiply(
@@ -355,7 +1298,7 @@ def _tensor_matrix_multiply(
 
     Optimizations:
 
-    * Outer loop in parallel
+    * Outer loop in parallel over (batch x row block x column block) tasks
     * No index buffers or function calls
     * Inner loop should have no global writes, 1 multiply.
 
@@ -397,7 +1340,20 @@ def _tensor_matrix_multiply(
     out_M_stride = int(out_strides[1])
     out_N_stride = int(out_strides[2])
 
-    for batch in prange(batch_size):
+    # Work is split into (batch x row block x column block) tasks.
+    row_block, col_block = matmul_partition(batch_size, M, N, 1, 1)
+    n_row_blocks = (M + row_block - 1) // row_block
+    n_col_blocks = (N + col_block - 1) // col_block
+    blocks_per_batch = n_row_blocks * n_col_blocks
+
+    for task in prange(batch_size * blocks_per_batch):
+        batch = task // blocks_per_batch
+        block = task % blocks_per_batch
+        i_start = (block // n_col_blocks) * row_block
+        i_end = min(M, i_start + row_block)
+        j_start = (block % n_col_blocks) * col_block
+        j_end = min(N, j_start + col_block)
+
         # Handle broadcasting over batch dimension
         a_batch_index = int(batch if a_shape[0] > 1 else 0)
         b_batch_index = int(batch if b_shape[0] > 1 else 0)
@@ -406,10 +1362,10 @@ def _tensor_matrix_multiply(
         b_batch_offset = b_batch_index * b_batch_stride
         out_batch_offset = batch * out_batch_stride
 
-        for i in range(M):
+        for i in range(i_start, i_end):
             a_row_offset = a_batch_offset + i * a_M_stride
             out_row_offset = out_batch_offset + i * out_M_stride
-            for j in range(N):
+            for j in range(j_start, j_end):
                 total = 0.0
                 for k in range(K):
                     a_pos = a_row_offset + k * a_K_stride
@@ -419,5 +1375,153 @@ def _tensor_matrix_multiply(
                 out[int(out_pos)] = total
 
 
-tensor_matrix_multiply = njit(_tensor_matrix_multiply, parallel=True)
+tensor_matrix_multiply = kernel(_tensor_matrix_multiply)
+tensor_matrix_multiply_serial = kernel(_tensor_matrix_multiply, parallel=False)
 assert tensor_matrix_multiply is not None
+
+
+def _tensor_matrix_multiply_tiled(
+    out: Storage,
+    out_shape: Shape,
+    out_strides: Strides,
+    a_storage: Storage,
+    a_shape: Shape,
+    a_strides: Strides,
+    b_storage: Storage,
+    b_shape: Shape,
+    b_strides: Strides,
+) -> None:
+    """NUMBA cache-blocked tensor matrix multiply function.
+
+    Same contract as `_tensor_matrix_multiply`, but `out` must be zero
+    filled since partial products over each block of the shared dimension
+    are accumulated into it.
+
+    Optimizations:
+
+    * Outer loop in parallel over (batch x row block x column block) tasks
+    * The shared dimension is split into blocks of `MM_KC`
+    * Panels of `a` and `b` are packed into contiguous, zero-padded
+      buffers so the micro-kernel reads both with unit stride
+    * Micro-kernel computes an `MM_MR x MM_NR` tile of `out` per pass
+
+    Args:
+    ----
+        out (Storage): storage for `out` tensor
+        out_shape (Shape): shape for `out` tensor
+        out_strides (Strides): strides for `out` tensor
+        a_storage (Storage): storage for `a` tensor
+        a_shape (Shape): shape for `a` tensor
+        a_strides (Strides): strides for `a` tensor
+        b_storage (Storage): storage for `b` tensor
+        b_shape (Shape): shape for `b` tensor
+        b_strides (Strides): strides for `b` tensor
+
+    Returns:
+    -------
+        None : Fills in `out`
+
+    """
+    a_batch_stride = a_strides[0] if a_shape[0] > 1 else 0
+    b_batch_stride = b_strides[0] if b_shape[0] > 1 else 0
+
+    batch_size = int(out_shape[0])
+    M = int(out_shape[1])
+    N = int(out_shape[2])
+    K = int(a_shape[2])
+
+    out_batch_stride = int(out_strides[0])
+    a_M_stride = int(a_strides[1])
+    a_K_stride = int(a_strides[2])
+    b_K_stride = int(b_strides[1])
+    b_N_stride = int(b_strides[2])
+    out_M_stride = int(out_strides[1])
+    out_N_stride = int(out_strides[2])
+
+    # Work is split into (batch x row block x column block) tasks, with
+    # blocks aligned to the micro-kernel tile.
+    row_block, col_block = matmul_partition(batch_size, M, N, MM_MR, MM_NR)
+    n_row_blocks = (M + row_block - 1) // row_block
+    n_col_blocks = (N + col_block - 1) // col_block
+    blocks_per_batch = n_row_blocks * n_col_blocks
+
+    for task in prange(batch_size * blocks_per_batch):
+        batch = task // blocks_per_batch
+        block = task % blocks_per_batch
+        i_start = (block // n_col_blocks) * row_block
+        i_end = min(M, i_start + row_block)
+        j_start = (block % n_col_blocks) * col_block
+        j_end = min(N, j_start + col_block)
+
+        # Per-task packing buffers and accumulator tile.
+        a_pack = np.empty(MM_MC * MM_KC, dtype=out.dtype)
+        b_pack = np.empty(MM_KC * MM_NC, dtype=out.dtype)
+        acc = np.empty(MM_MR * MM_NR, dtype=out.dtype)
+
+        a_batch_offset = batch * a_batch_stride
+        b_batch_offset = batch * b_batch_stride
+        out_batch_offset = batch * out_batch_stride
+
+        for jc in range(j_start, j_end, MM_NC):
+            nc = min(MM_NC, j_end - jc)
+            for pc in range(0, K, MM_KC):
+                kc = min(MM_KC, K - pc)
+
+                # Pack b[pc:pc+kc, jc:jc+nc] as MM_NR wide column slivers.
+                for jr in range(0, nc, MM_NR):
+                    sliver = jr * kc
+                    for p in range(kc):
+                        b_row = b_batch_offset + (pc + p) * b_K_stride
+                        for jj in range(MM_NR):
+                            if jr + jj < nc:
+                                b_pack[sliver + p * MM_NR + jj] = b_storage[
+                                    b_row + (jc + jr + jj) * b_N_stride
+                                ]
+                            else:
+                                b_pack[sliver + p * MM_NR + jj] = 0.0
+
+                for ic in range(i_start, i_end, MM_MC):
+                    mc = min(MM_MC, i_end - ic)
+
+                    # Pack a[ic:ic+mc, pc:pc+kc] as MM_MR tall row slivers.
+                    for ir in range(0, mc, MM_MR):
+                        sliver = ir * kc
+                        for p in range(kc):
+                            a_col = a_batch_offset + (pc + p) * a_K_stride
+                            for ii in range(MM_MR):
+                                if ir + ii < mc:
+                                    a_pack[sliver + p * MM_MR + ii] = a_storage[
+                                        a_col + (ic + ir + ii) * a_M_stride
+                                    ]
+                                else:
+                                    a_pack[sliver + p * MM_MR + ii] = 0.0
+
+                    # Micro-kernel over MM_MR x MM_NR tiles of out.
+                    for jr in range(0, nc, MM_NR):
+                        for ir in range(0, mc, MM_MR):
+                            for t in range(MM_MR * MM_NR):
+                                acc[t] = 0.0
+                            a_off = ir * kc
+                            b_off = jr * kc
+                            for p in range(kc):
+                                for ii in range(MM_MR):
+                                    av = a_pack[a_off + p * MM_MR + ii]
+                                    for jj in range(MM_NR):
+                                        acc[ii * MM_NR + jj] += (
+                                            av * b_pack[b_off + p * MM_NR + jj]
+                                        )
+
+                            for ii in range(min(MM_MR, mc - ir)):
+                                out_row = (
+                                    out_batch_offset + (ic + ir + ii) * out_M_stride
+                                )
+                                for jj in range(min(MM_NR, nc - jr)):
+                                    out_pos = out_row + (jc + jr + jj) * out_N_stride
+                                    out[out_pos] += acc[ii * MM_NR + jj]
+
+
+tensor_matrix_multiply_tiled = kernel(_tensor_matrix_multiply_tiled)
+tensor_matrix_multiply_tiled_serial = kernel(
+    _tensor_matrix_multiply_tiled, parallel=False
+)
+assert tensor_matrix_multiply_tiled is not None
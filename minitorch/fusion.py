@@ -0,0 +1,271 @@
+"""Tracing of elementwise expressions for operator fusion.
+
+An elementwise function written with the `Tensor` API, such as
+`lambda x, y: (x * y + 1.0).log()`, is traced by calling it on `Expr`
+placeholders. The resulting expression tree can be differentiated
+symbolically and compiled, through generated source, into a single scalar
+function of the values of all inputs, which the backends evaluate with one
+n-ary kernel.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Sequence, Set, Tuple, Union
+
+from . import operators
+
+ExprLike = Union["Expr", float, int]
+
+# Scalar operators available to expressions.
+EXPR_OPS: Dict[str, Callable[..., float]] = {
+    "add": operators.add,
+    "mul": operators.mul,
+    "neg": operators.neg,
+    "inv": operators.inv,
+    "lt": operators.lt,
+    "eq": operators.eq,
+    "log": operators.log,
+    "exp": operators.exp,
+    "sigmoid": operators.sigmoid,
+    "relu": operators.relu,
+    "log_back": operators.log_back,
+    "inv_back": operators.inv_back,
+    "relu_back": operators.relu_back,
+}
+
+
+class Expr:
+    """Node of a traced elementwise expression.
+
+    Supports the arithmetic, comparison and activation methods of `Tensor`
+    so that the same function can be applied to tensors or traced.
+    """
+
+    def diff(self, i: int) -> Expr:
+        """Symbolic derivative with respect to input `i`."""
+        raise NotImplementedError
+
+    def source(self) -> str:
+        """Python source of the expression over the sequence of input values `v`."""
+        raise NotImplementedError
+
+    def build(self, jit: Callable[[Any], Any]) -> Callable[[Sequence[float]], float]:
+        """Compile into a single function of the input values.
+
+        Args:
+        ----
+            jit: decorator applied to the generated function and the scalar
+                operators it calls, e.g. `njit` for the fast backend or the
+                identity for pure Python.
+
+        Returns:
+        -------
+            Function mapping the sequence of input values to the output.
+
+        """
+        namespace: Dict[str, Any] = {
+            name: jit(fn) for name, fn in EXPR_OPS.items() if name in self.ops()
+        }
+        code = f"def fused(v):\n    return {self.source()}\n"
+        exec(compile(code, f"<fused {self!r}>", "exec"), namespace)
+        return jit(namespace["fused"])
+
+    def ops(self) -> Set[str]:
+        """Names of the scalar operators used by the expression."""
+        return set()
+
+    def __add__(self, b: ExprLike) -> Expr:
+        return add(self, as_expr(b))
+
+    def __radd__(self, b: ExprLike) -> Expr:
+        return add(as_expr(b), self)
+
+    def __sub__(self, b: ExprLike) -> Expr:
+        return add(self, neg(as_expr(b)))
+
+    def __rsub__(self, b: ExprLike) -> Expr:
+        return add(as_expr(b), neg(self))
+
+    def __mul__(self, b: ExprLike) -> Expr:
+        return mul(self, as_expr(b))
+
+    def __rmul__(self, b: ExprLike) -> Expr:
+        return mul(as_expr(b), self)
+
+    def __truediv__(self, b: ExprLike) -> Expr:
+        return mul(self, Op("inv", as_expr(b)))
+
+    def __rtruediv__(self, b: ExprLike) -> Expr:
+        return mul(as_expr(b), Op("inv", self))
+
+    def __neg__(self) -> Expr:
+        return neg(self)
+
+    def __lt__(self, b: ExprLike) -> Expr:
+        return Op("lt", self, as_expr(b))
+
+    def __gt__(self, b: ExprLike) -> Expr:
+        return Op("lt", as_expr(b), self)
+
+    def __eq__(self, b: ExprLike) -> Expr:  # type: ignore[override]
+        return Op("eq", self, as_expr(b))
+
+    __hash__ = object.__hash__
+
+    def log(self) -> Expr:  # noqa: D102
+        return Op("log", self)
+
+    def exp(self) -> Expr:  # noqa: D102
+        return Op("exp", self)
+
+    def sigmoid(self) -> Expr:  # noqa: D102
+        return Op("sigmoid", self)
+
+    def relu(self) -> Expr:  # noqa: D102
+        return Op("relu", self)
+
+
+class Var(Expr):
+    """The value of input `index`."""
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def diff(self, i: int) -> Expr:  # noqa: D102
+        return Const(1.0 if i == self.index else 0.0)
+
+    def source(self) -> str:  # noqa: D102
+        return f"v[{self.index}]"
+
+    def __repr__(self) -> str:
+        return f"x{self.index}"
+
+
+class Const(Expr):
+    """A constant value."""
+
+    def __init__(self, value: float):
+        self.value = float(value)
+
+    def diff(self, i: int) -> Expr:  # noqa: D102
+        return Const(0.0)
+
+    def source(self) -> str:  # noqa: D102
+        return repr(self.value)
+
+    def __repr__(self) -> str:
+        return repr(self.value)
+
+
+class Op(Expr):
+    """Application of the scalar operator `EXPR_OPS[name]` to `args`."""
+
+    def __init__(self, name: str, *args: Expr):
+        assert name in EXPR_OPS, f"Unknown operator {name}"
+        self.name = name
+        self.args: Tuple[Expr, ...] = args
+
+    def diff(self, i: int) -> Expr:  # noqa: D102
+        name = self.name
+        a = self.args[0]
+        da = a.diff(i)
+        if name == "add":
+            return add(da, self.args[1].diff(i))
+        if name == "mul":
+            b = self.args[1]
+            return add(mul(da, b), mul(a, b.diff(i)))
+        if name in ("lt", "eq"):
+            return Const(0.0)
+        if _is_const(da, 0.0):
+            return Const(0.0)
+        if name == "neg":
+            return neg(da)
+        if name == "inv":
+            return Op("inv_back", a, da)
+        if name == "log":
+            return Op("log_back", a, da)
+        if name == "exp":
+            return mul(Op("exp", a), da)
+        if name == "sigmoid":
+            s = Op("sigmoid", a)
+            return mul(mul(s, add(Const(1.0), neg(s))), da)
+        if name == "relu":
+            return Op("relu_back", a, da)
+        raise NotImplementedError(f"No derivative for {name}")
+
+    def source(self) -> str:  # noqa: D102
+        args = [a.source() for a in self.args]
+        if self.name == "add":
+            return f"({args[0]} + {args[1]})"
+        if self.name == "mul":
+            return f"({args[0]} * {args[1]})"
+        if self.name == "neg":
+            return f"(-{args[0]})"
+        return f"{self.name}({', '.join(args)})"
+
+    def ops(self) -> Set[str]:  # noqa: D102
+        used = {self.name}
+        for a in self.args:
+            used |= a.ops()
+        return used
+
+    def __repr__(self) -> str:
+        return f"{self.name}({', '.join(repr(a) for a in self.args)})"
+
+
+def as_expr(x: ExprLike) -> Expr:
+    """Wrap plain numbers as constants."""
+    if isinstance(x, Expr):
+        return x
+    return Const(x)
+
+
+def _is_const(x: Expr, value: float) -> bool:
+    return isinstance(x, Const) and x.value == value
+
+
+def add(a: Expr, b: Expr) -> Expr:
+    """Sum of two expressions, folding constants and zeros."""
+    if isinstance(a, Const) and isinstance(b, Const):
+        return Const(a.value + b.value)
+    if _is_const(a, 0.0):
+        return b
+    if _is_const(b, 0.0):
+        return a
+    return Op("add", a, b)
+
+
+def mul(a: Expr, b: Expr) -> Expr:
+    """Product of two expressions, folding constants, zeros and ones."""
+    if isinstance(a, Const) and isinstance(b, Const):
+        return Const(a.value * b.value)
+    if _is_const(a, 0.0) or _is_const(b, 0.0):
+        return Const(0.0)
+    if _is_const(a, 1.0):
+        return b
+    if _is_const(b, 1.0):
+        return a
+    return Op("mul", a, b)
+
+
+def neg(a: Expr) -> Expr:
+    """Negation of an expression, folding constants."""
+    if isinstance(a, Const):
+        return Const(-a.value)
+    return Op("neg", a)
+
+
+def trace(fn: Callable[..., Any], n: int) -> Expr:
+    """Trace an elementwise function of `n` inputs into an expression.
+
+    Args:
+    ----
+        fn: function written with `Tensor` arithmetic and methods
+        n: number of inputs of `fn`
+
+    Returns:
+    -------
+        Expression over `Var(0) ... Var(n - 1)`.
+
+    """
+    return as_expr(fn(*[Var(i) for i in range(n)]))
@@ -81,6 +81,22 @@ def add(x: float, y: float) -> float:
     return x + y
 
 
+def sub(x: float, y: float) -> float:
+    """Subtracts one number from another.
+
+    Args:
+    ----
+        x (float): The number to subtract from.
+        y (float): The number to subtract.
+
+    Returns:
+    -------
+        float: The difference of x and y.
+
+    """
+    return x - y
+
+
 def neg(x: float) -> float:
     """Negates a number.
 
@@ -29,12 +29,19 @@ class SGD(Optimizer):
         super().__init__(parameters)
         self.lr = lr
 
-    def zero_grad(self) -> None:
+    def zero_grad(self, set_to_none: bool = True) -> None:
         """Reset the gradients of all optimized parameters to zero.
 
         This method should be called before computing the gradients
         in a new optimization step to prevent accumulation of gradients
         from multiple backward passes.
+
+        Args:
+        ----
+            set_to_none (bool, optional): Drop tensor gradients. Otherwise
+                they are zeroed in place and backward accumulates into the
+                same buffers every step. Defaults to True.
+
         """
         for p in self.parameters:
             if p.value is None:
@@ -44,7 +51,7 @@ class SGD(Optimizer):
                     p.value.derivative = None
             if hasattr(p.value, "grad"):
                 if p.value.grad is not None:
-                    p.value.grad = None
+                    p.value.zero_grad_(set_to_none)
 
     def step(self) -> None:
         """Perform a single optimization step.
@@ -60,7 +67,7 @@ class SGD(Optimizer):
           `p.value` by subtracting `lr * p.value.derivative`.
 
         - Else if `p.value` has an attribute `grad`, and it is not `None`, update
-          `p.value` by subtracting `lr * p.value.grad`.
+          `p.value` in place by subtracting `lr * p.value.grad`.
         """
         for p in self.parameters:
             if p.value is None:
@@ -70,4 +77,4 @@ class SGD(Optimizer):
                     p.update(Scalar(p.value.data - self.lr * p.value.derivative))
             elif hasattr(p.value, "grad"):
                 if p.value.grad is not None:
-                    p.update(p.value - self.lr * p.value.grad)
+                    p.value.sub_(p.value.grad * self.lr)
@@ -0,0 +1,267 @@
+"""Op-level profiler.
+
+Inside `with profiler() as prof:`, every `Function` forward and backward,
+every backend operator call and every `Tensor.backward` is recorded with
+its input shapes, phase, wall time and the bytes of storage it allocated.
+`prof.table()` aggregates them by op and `prof.export_chrome_trace(path)`
+writes a trace for chrome://tracing or Perfetto.
+
+When no profiler is active, backend operators are not wrapped at all and
+the other hooks only read `_active`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .allocator import CachingAllocator
+
+# The running profiler, read by the hooks of `Function`, `TensorBackend`
+# and `Tensor.backward`.
+_active: Optional[Profile] = None
+
+# Backends whose operators are swapped for recording ones while a profiler
+# is running, see `TensorBackend._set_profiled`.
+_backends: weakref.WeakSet = weakref.WeakSet()
+
+
+@dataclass
+class ProfileEvent:
+    """One recorded call.
+
+    Attributes
+    ----------
+        name (str): `Function` class, backend operator or "backward".
+        phase (str): "forward" or "backward".
+        shapes (Tuple[Tuple[int, ...], ...]): Shapes of the array arguments.
+        start (int): Start in ns since the profiler started.
+        duration (int): Wall time in ns, including nested calls.
+        self_duration (int): Wall time in ns, excluding nested calls.
+        bytes (int): Storage allocated, including nested calls.
+        thread (int): Id of the calling thread.
+
+    """
+
+    name: str
+    phase: str
+    shapes: Tuple[Tuple[int, ...], ...]
+    start: int
+    duration: int
+    self_duration: int
+    bytes: int
+    thread: int
+
+
+@dataclass
+class OpStats:
+    """Events of one op and phase, summed."""
+
+    name: str
+    phase: str
+    calls: int = 0
+    total: int = 0
+    self_total: int = 0
+    bytes: int = 0
+
+
+class _Frame:
+    __slots__ = ("phase", "children")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+        self.children = 0
+
+
+class Profile:
+    """Events recorded by a `profiler`.
+
+    Attributes
+    ----------
+        events (List[ProfileEvent]): Recorded calls, in completion order.
+
+    """
+
+    def __init__(self) -> None:
+        self.events: List[ProfileEvent] = []
+        self._origin = time.perf_counter_ns()
+        self._local = threading.local()
+
+    def record(
+        self,
+        name: str,
+        phase: Optional[str],
+        allocator: Optional[CachingAllocator],
+        fn: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """Call `fn(*args, **kwargs)` and record it as an event.
+
+        Args:
+        ----
+            name: name of the event
+            phase: "forward" or "backward"; None for the phase of the
+                enclosing event, forward outside of any
+            allocator: allocator whose bytes are counted, if any
+            fn: function to call
+            *args: positional arguments of `fn`, the shapes of those with
+                a `shape` are recorded
+            **kwargs: keyword arguments of `fn`
+
+        Returns:
+        -------
+            The result of `fn`.
+
+        """
+        stack: Optional[List[_Frame]] = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        if phase is None:
+            phase = stack[-1].phase if stack else "forward"
+        frame = _Frame(phase)
+        shapes = tuple(tuple(a.shape) for a in args if hasattr(a, "shape"))
+        allocated = 0 if allocator is None else allocator.allocated_bytes
+        stack.append(frame)
+        start = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            duration = time.perf_counter_ns() - start
+            stack.pop()
+            if stack:
+                stack[-1].children += duration
+            if allocator is not None:
+                allocated = allocator.allocated_bytes - allocated
+            self.events.append(
+                ProfileEvent(
+                    name,
+                    phase,
+                    shapes,
+                    start - self._origin,
+                    duration,
+                    duration - frame.children,
+                    allocated,
+                    threading.get_ident(),
+                )
+            )
+
+    def stats(self) -> List[OpStats]:
+        """Events summed by op and phase.
+
+        Returns
+        -------
+            One `OpStats` per name and phase, by decreasing self time.
+
+        """
+        totals: Dict[Tuple[str, str], OpStats] = {}
+        for e in self.events:
+            s = totals.get((e.name, e.phase))
+            if s is None:
+                s = totals[e.name, e.phase] = OpStats(e.name, e.phase)
+            s.calls += 1
+            s.total += e.duration
+            s.self_total += e.self_duration
+            s.bytes += e.bytes
+        return sorted(totals.values(), key=lambda s: -s.self_total)
+
+    def table(self, sort_by: str = "self_total", limit: Optional[int] = None) -> str:
+        """Aggregated events as a text table.
+
+        Args:
+        ----
+            sort_by: `OpStats` field to sort by, in decreasing order
+            limit: maximum number of rows
+
+        Returns:
+        -------
+            The table, one row per op and phase.
+
+        """
+        rows = sorted(self.stats(), key=lambda s: getattr(s, sort_by), reverse=True)
+        lines = [
+            f"{'name':<24} {'phase':<8} {'calls':>7} {'total ms':>10}"
+            f" {'self ms':>10} {'avg us':>9} {'MB':>9}"
+        ]
+        for s in rows[:limit]:
+            lines.append(
+                f"{s.name:<24} {s.phase:<8} {s.calls:>7} {s.total / 1e6:>10.3f}"
+                f" {s.self_total / 1e6:>10.3f} {s.total / s.calls / 1e3:>9.1f}"
+                f" {s.bytes / 2**20:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the events in the Chrome trace event format.
+
+        Args:
+        ----
+            path: file to write, open it in chrome://tracing or Perfetto
+
+        """
+        pid = os.getpid()
+        trace = [
+            {
+                "name": e.name,
+                "cat": e.phase,
+                "ph": "X",
+                "ts": e.start / 1e3,
+                "dur": e.duration / 1e3,
+                "pid": pid,
+                "tid": e.thread,
+                "args": {"shapes": e.shapes, "bytes": e.bytes},
+            }
+            for e in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+@contextmanager
+def profiler() -> Iterator[Profile]:
+    """Record the ops run in the block, see `Profile`.
+
+    Example ::
+
+        with minitorch.profiler() as prof:
+            loss = model(x).sum()
+            loss.backward()
+        print(prof.table(limit=10))
+        prof.export_chrome_trace("trace.json")
+
+    Returns
+    -------
+        Context manager yielding the `Profile` being recorded.
+
+    """
+    global _active
+    assert _active is None, "A profiler is already running."
+    prof = Profile()
+    _active = prof
+    for backend in list(_backends):
+        backend._set_profiled(True)
+    try:
+        yield prof
+    finally:
+        _active = None
+        for backend in list(_backends):
+            backend._set_profiled(False)
+
+
+def _profiled_op(name: str, backend: Any, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Backend operator `fn`, recorded by the active profiler."""
+
+    def op(*args: Any, **kwargs: Any) -> Any:
+        prof = _active
+        if prof is None:
+            return fn(*args, **kwargs)
+        return prof.record(name, None, backend.allocator, fn, *args, **kwargs)
+
+    op.__wrapped__ = fn  # type: ignore
+    return op
@@ -93,13 +93,14 @@ class Scalar:
 
     # Variable elements for backprop
 
-    def accumulate_derivative(self, x: Any) -> None:
+    def accumulate_derivative(self, x: Any, owned: bool = False) -> None:
         """Add `val` to the the derivative accumulated on this variable.
         Should only be called during autodifferentiation on leaf variables.
 
         Args:
         ----
             x: value to be accumulated
+            owned: unused, floats are never updated in place
 
         """
         assert self.is_leaf(), "Only leaf variables can have derivatives."
@@ -145,18 +146,21 @@ class Scalar:
             (var, d) for var, d in zip(h.inputs, derivatives) if not var.is_constant()
         ]
 
-    def backward(self, d_output: Optional[float] = None) -> None:
+    def backward(
+        self, d_output: Optional[float] = None, retain_graph: bool = False
+    ) -> None:
         """Calls autodiff to fill in the derivatives for the history of this object.
 
         Args:
         ----
             d_output (number, opt): starting derivative to backpropagate through the model
                                    (typically left out, and assumed to be 1.0).
+            retain_graph (bool): keep the graph to call backward again, see `backpropagate`.
 
         """
         if d_output is None:
             d_output = 1.0
-        backpropagate(self, d_output)
+        backpropagate(self, d_output, retain_graph)
 
     # TODO: Implement for Task 1.2.
     def __add__(self, b: ScalarLike) -> Scalar:
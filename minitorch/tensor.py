@@ -3,13 +3,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, overload
 
 import numpy as np
 
-from . import operators
+from . import operators, profiling
 from .autodiff import Context, Variable, backpropagate
-from .tensor_data import TensorData
+from .tensor_data import IndexingError, TensorData, float_dtype
+from .tensor_ops import SimpleBackend, TensorBackend
 
 # Comment these out if not yet implemented
 from .tensor_functions import (
@@ -28,21 +29,32 @@ from .tensor_functions import (
     Permute,
     ReLU,
     Sigmoid,
+    Slice,
     Sum,
     View,
     # tensor,
 )
 
 if TYPE_CHECKING:
-    from typing import Any, Iterable, List, Optional, Sequence, Tuple, Type, Union
+    from typing import (
+        Any,
+        Callable,
+        Iterable,
+        List,
+        Optional,
+        Sequence,
+        Tuple,
+        Type,
+        Union,
+    )
 
     import numpy.typing as npt
 
     from .tensor_data import Shape, Storage, Strides, UserIndex, UserShape, UserStrides
     from .tensor_functions import Function
-    from .tensor_ops import TensorBackend
 
     TensorLike = Union[float, int, "Tensor"]
+    SliceKey = Union[int, slice, Tuple[Union[int, slice], ...]]
 
 
 @dataclass
@@ -108,7 +120,7 @@ class Tensor:
             x (bool): If True, enables gradient computation for this tensor.
 
         """
-        self.history = History()
+        self.history = History() if x else None
 
     def requires_grad(self) -> bool:
         """Check if this tensor requires gradient computation.
@@ -120,15 +132,42 @@ class Tensor:
         """
         return self.history is not None
 
-    def to_numpy(self) -> npt.NDArray[np.float64]:
+    def to_numpy(self) -> npt.NDArray[np.floating]:
         """Convert the tensor to a NumPy array.
 
+        The array is a view of the tensor's storage, without copying.
+
         Returns
         -------
             numpy.ndarray: A NumPy array with the same data as this tensor.
 
         """
-        return self.contiguous()._tensor._storage.reshape(self.shape)
+        return self._tensor.to_numpy()
+
+    @staticmethod
+    def from_numpy(
+        arr: npt.NDArray,
+        backend: TensorBackend = SimpleBackend,
+        requires_grad: bool = False,
+    ) -> Tensor:
+        """Create a tensor sharing the memory of a NumPy array.
+
+        See `TensorData.from_numpy` for the arrays that are copied instead.
+
+        Args:
+        ----
+            arr (numpy.ndarray): The array to wrap.
+            backend (TensorBackend): The backend to use.
+            requires_grad (bool): Turn on autodifferentiation.
+
+        Returns:
+        -------
+            Tensor: A tensor with the shape and strides of `arr`.
+
+        """
+        tensor = Tensor(TensorData.from_numpy(arr), backend=backend)
+        tensor.requires_grad_(requires_grad)
+        return tensor
 
     def _ensure_tensor(self, b: TensorLike) -> Tensor:
         """Ensure that the input is a tensor with the same backend.
@@ -143,7 +182,9 @@ class Tensor:
 
         """
         if isinstance(b, (int, float)):
-            c = Tensor.make([b], (1,), backend=self.backend)
+            c = Tensor.make(
+                [b], (1,), backend=self.backend, dtype=float_dtype(self.dtype)
+            )
         else:
             b._type_(self.backend)
             c = b
@@ -162,8 +203,7 @@ class Tensor:
 
         """
         assert self.size == 1
-        x: float = self._tensor._storage[0]
-        return x
+        return float(self._tensor._storage[self._tensor.offset])
 
     def contiguous(self) -> Tensor:
         """Return a contiguous tensor with the same data.
@@ -185,20 +225,54 @@ class Tensor:
         """
         return self._tensor.to_string()
 
-    def __getitem__(self, key: Union[int, UserIndex]) -> float:
-        """Get an item from the tensor.
+    @overload
+    def __getitem__(self, key: Union[int, UserIndex]) -> float: ...
+
+    @overload
+    def __getitem__(self, key: SliceKey) -> Tensor: ...
+
+    def __getitem__(self, key: Any) -> Any:
+        """Get an item, or a view of part of the tensor.
+
+        A key of one int per dimension accesses a single element. Other
+        keys, such as `t[a:b, :, ::2]` or `t[i]`, select part of the tensor
+        without copying; ints among them select one index and remove the
+        dimension. Missing trailing dimensions are kept whole.
 
         Args:
         ----
-            key (int or tuple of ints): Index or indices to access.
+            key (int, slice or tuple of them): Index or indices to access.
 
         Returns:
         -------
-            float: The value at the specified index.
+            float or Tensor: The value at the specified index, or a view.
+
+        Raises:
+        ------
+            IndexingError: If the key is out of range or has a negative step.
 
         """
-        key2 = (key,) if isinstance(key, int) else key
-        return self._tensor.get(key2)
+        key2 = key if isinstance(key, tuple) else (key,)
+        if len(key2) == self.dims and not any(isinstance(k, slice) for k in key2):
+            return self._tensor.get(key2)
+        if len(key2) > self.dims:
+            raise IndexingError(f"Too many indices {key} for {self.shape}.")
+        spec = []
+        for d, size in enumerate(self.shape):
+            k = key2[d] if d < len(key2) else slice(None)
+            if isinstance(k, slice):
+                start, stop, step = k.indices(size)
+                if step < 0:
+                    raise IndexingError("Negative slice steps not supported.")
+                spec.append((start, len(range(start, stop, step)), step))
+            else:
+                if not 0 <= k < size:
+                    raise IndexingError(f"Index {k} out of range {self.shape}.")
+                spec.append((int(k), 1, 0))
+        return self._slice(spec)
+
+    def _slice(self, spec: Sequence[Tuple[int, int, int]]) -> Tensor:
+        return Slice.apply(self, spec=spec)
 
     def __setitem__(self, key: Union[int, UserIndex], val: float) -> None:
         """Set an item in the tensor.
@@ -245,6 +319,8 @@ class Tensor:
         shape: UserShape,
         strides: Optional[UserStrides] = None,
         backend: Optional[TensorBackend] = None,
+        dtype: Optional[npt.DTypeLike] = None,
+        offset: int = 0,
     ) -> Tensor:
         """Create a new tensor from data.
 
@@ -254,13 +330,17 @@ class Tensor:
             shape (tuple of ints): The shape of the tensor.
             strides (Optional[tuple of ints]): The strides for the tensor.
             backend (Optional[TensorBackend]): The backend to use.
+            dtype (Optional[DTypeLike]): float32 or float64, see `TensorData`.
+            offset (int): Position in storage of the first element.
 
         Returns:
         -------
             Tensor: A new tensor with the given data and shape.
 
         """
-        return Tensor(TensorData(storage, shape, strides), backend=backend)
+        return Tensor(
+            TensorData(storage, shape, strides, dtype, offset), backend=backend
+        )
 
     def expand(self, other: Tensor) -> Tensor:
         """Expand the tensor to match the shape of another tensor for backpropagation.
@@ -282,7 +362,7 @@ class Tensor:
 
         # Case 2: Backward is a smaller than self. Broadcast up.
         true_shape = TensorData.shape_broadcast(self.shape, other.shape)
-        buf = self.zeros(true_shape)
+        buf = self.empty(true_shape, other.dtype)
         self.backend.id_map(other, buf)
         if self.shape == true_shape:
             return buf
@@ -298,30 +378,54 @@ class Tensor:
         return Tensor.make(out._tensor._storage, self.shape, backend=self.backend)
         # END CODE CHANGE (2021)
 
-    def zeros(self, shape: Optional[UserShape] = None) -> Tensor:
+    def zeros(
+        self, shape: Optional[UserShape] = None, dtype: Optional[npt.DTypeLike] = None
+    ) -> Tensor:
         """Create a tensor filled with zeros.
 
         Args:
         ----
             shape (Optional[tuple of ints]): The shape of the tensor. If None, uses self.shape.
+            dtype (Optional[DTypeLike]): The type of the tensor. If None, uses self.dtype.
 
         Returns:
         -------
             Tensor: A tensor of zeros with the specified shape.
 
         """
+        return self._alloc(self.backend.allocator.zeros, shape, dtype)
 
-        def zero(shape: UserShape) -> Tensor:
-            return Tensor.make(
-                [0.0] * int(operators.prod([ele for ele in shape])),
-                shape,
-                backend=self.backend,
-            )
+    def empty(
+        self, shape: Optional[UserShape] = None, dtype: Optional[npt.DTypeLike] = None
+    ) -> Tensor:
+        """Create a tensor without initializing its values.
 
-        if shape is None:
-            out = zero(self.shape)
-        else:
-            out = zero(shape)
+        For outputs that a kernel overwrites entirely.
+
+        Args:
+        ----
+            shape (Optional[tuple of ints]): The shape of the tensor. If None, uses self.shape.
+            dtype (Optional[DTypeLike]): The type of the tensor. If None, uses self.dtype.
+
+        Returns:
+        -------
+            Tensor: A tensor of arbitrary values with the specified shape.
+
+        """
+        return self._alloc(self.backend.allocator.empty, shape, dtype)
+
+    def _alloc(
+        self,
+        fn: Callable[..., Storage],
+        shape: Optional[UserShape],
+        dtype: Optional[npt.DTypeLike],
+    ) -> Tensor:
+        shape = self.shape if shape is None else shape
+        out = Tensor.make(
+            fn(int(operators.prod(shape)), self.dtype if dtype is None else dtype),
+            shape,
+            backend=self.backend,
+        )
         out._type_(self.backend)
         return out
 
@@ -347,24 +451,28 @@ class Tensor:
 
     # Variable elements for backprop
 
-    def accumulate_derivative(self, x: Any) -> None:
+    def accumulate_derivative(self, x: Any, owned: bool = False) -> None:
         """Add a value to the derivative accumulated on this variable.
 
         Should only be called during autodifferentiation on leaf variables.
+        An existing `grad` is updated in place.
 
         Args:
         ----
             x (Any): Value to be accumulated.
+            owned (bool): `x` is not referenced elsewhere, so it can become
+                `grad` without a copy.
 
         """
         assert self.is_leaf(), "Only leaf variables can have derivatives."
-        if self.grad is None:
-            self.grad = Tensor.make(
-                [0.0] * int(operators.prod([ele for ele in self.shape])),
-                self.shape,
-                backend=self.backend,
-            )
-        self.grad += x
+        if self.grad is not None:
+            self.grad.add_(x)
+            return
+        dtype = float_dtype(self.dtype)
+        if owned and x.dtype == dtype and x.shape == self.shape:
+            self.grad = x
+        else:
+            self.grad = self.empty(dtype=dtype).copy_(x)
 
     def is_leaf(self) -> bool:
         """Check if this variable was created by the user (no `last_fn`).
@@ -422,12 +530,16 @@ class Tensor:
             for inp, d_in in zip(h.inputs, x)
         ]
 
-    def backward(self, grad_output: Optional[Tensor] = None) -> None:
+    def backward(
+        self, grad_output: Optional[Tensor] = None, retain_graph: bool = False
+    ) -> None:
         """Compute the gradients of this tensor with respect to its inputs.
 
         Args:
         ----
             grad_output (Optional[Tensor]): The gradient of the output. If None, uses a tensor of ones.
+            retain_graph (bool): Keep the graph to call backward again. By
+                default, saved tensors and history are freed during the pass.
 
         Raises:
         ------
@@ -436,8 +548,22 @@ class Tensor:
         """
         if grad_output is None:
             assert self.shape == (1,), "Must provide grad_output if non-scalar"
-            grad_output = Tensor.make([1.0], (1,), backend=self.backend)
-        backpropagate(self, grad_output)
+            grad_output = Tensor.make(
+                [1.0], (1,), backend=self.backend, dtype=float_dtype(self.dtype)
+            )
+        prof = profiling._active
+        if prof is not None:
+            prof.record(
+                "backward",
+                "backward",
+                self.backend.allocator,
+                backpropagate,
+                self,
+                grad_output,
+                retain_graph,
+            )
+            return
+        backpropagate(self, grad_output, retain_graph)
 
     def __truediv__(self, b: TensorLike) -> Tensor:
         """Divide this tensor by another tensor or scalar.
@@ -518,6 +644,28 @@ class Tensor:
         """
         return self._tensor.dims
 
+    @property
+    def dtype(self) -> np.dtype:
+        """Get the type of the elements of the tensor.
+
+        Returns
+        -------
+            numpy.dtype: float32 or float64.
+
+        """
+        return self._tensor.dtype
+
+    @property
+    def version(self) -> int:
+        """Get the number of in-place writes to the storage of the tensor.
+
+        Returns
+        -------
+            int: The version, shared with the views of the tensor.
+
+        """
+        return self._tensor._version[0]
+
     def __add__(self, b: TensorLike) -> Tensor:
         """Add another tensor or scalar to this tensor.
 
@@ -658,11 +806,7 @@ class Tensor:
             Tensor: A tensor containing the result.
 
         """
-        if dim is None:
-            return All.apply(self)
-        else:
-            dim_tensor = self._ensure_tensor(dim)
-            return All.apply(self, dim_tensor)
+        return All.apply(self, dim=dim)
 
     def is_close(self, b: TensorLike) -> Tensor:
         """Element-wise check if values are close between tensors.
@@ -731,13 +875,7 @@ class Tensor:
             Tensor: The sum of elements.
 
         """
-        if dim is None:
-            # Sum over all dimensions
-            dim_tensor = Tensor.make([-1], (1,), backend=self.backend)
-            return Sum.apply(self, dim_tensor)
-        else:
-            dim_tensor = Tensor.make([dim], (1,), backend=self.backend)
-            return Sum.apply(self, dim_tensor)
+        return Sum.apply(self, dim=dim)
 
     def mean(self, dim: Optional[int] = None) -> Tensor:
         """Compute the mean of tensor elements over a given dimension.
@@ -770,9 +908,7 @@ class Tensor:
             Tensor: A new tensor with permuted dimensions.
 
         """
-        # Convert the order tuple into a tensor
-        order_tensor = Tensor.make(list(order), (len(order),), backend=self.backend)
-        return Permute.apply(self, order_tensor)
+        return Permute.apply(self, order=tuple(order))
 
     def view(self, *shape: int) -> Tensor:
         """Return a new tensor with the same data but a different shape.
@@ -786,9 +922,161 @@ class Tensor:
             Tensor: A new tensor with the specified shape.
 
         """
-        shape_tensor = Tensor.make(list(shape), (len(shape),), backend=self.backend)
-        return View.apply(self, shape_tensor)
+        return View.apply(self, shape=tuple(shape))
 
-    def zero_grad_(self) -> None:
-        """Set the gradients of the tensor to zero."""
-        self.grad = None
+    def narrow(self, dim: int, start: int, length: int) -> Tensor:
+        """Return a view of `length` indices of dimension `dim` from `start`.
+
+        Args:
+        ----
+            dim (int): The dimension to narrow.
+            start (int): The first index kept.
+            length (int): The number of indices kept.
+
+        Returns:
+        -------
+            Tensor: A view sharing the storage of this tensor.
+
+        """
+        spec = [(0, size, 1) for size in self.shape]
+        spec[dim] = (start, length, 1)
+        return self._slice(spec)
+
+    def split(self, split_size: int, dim: int = 0) -> Tuple[Tensor, ...]:
+        """Split into views of `split_size` indices along `dim`.
+
+        Args:
+        ----
+            split_size (int): The size of each part. The last may be smaller.
+            dim (int): The dimension to split.
+
+        Returns:
+        -------
+            tuple of Tensors: Views sharing the storage of this tensor.
+
+        """
+        size = self.shape[dim]
+        return tuple(
+            self.narrow(dim, start, min(split_size, size - start))
+            for start in range(0, size, split_size)
+        )
+
+    def chunk(self, chunks: int, dim: int = 0) -> Tuple[Tensor, ...]:
+        """Split into at most `chunks` views of equal size along `dim`.
+
+        Args:
+        ----
+            chunks (int): The number of parts. The last may be smaller.
+            dim (int): The dimension to split.
+
+        Returns:
+        -------
+            tuple of Tensors: Views sharing the storage of this tensor.
+
+        """
+        return self.split(-(-self.shape[dim] // chunks), dim)
+
+    def zero_grad_(self, set_to_none: bool = True) -> None:
+        """Set the gradients of the tensor to zero.
+
+        Args:
+        ----
+            set_to_none (bool): Drop `grad`, so that the next backward
+                allocates it again. Otherwise it is zeroed in place and
+                reused.
+
+        """
+        if set_to_none or self.grad is None:
+            self.grad = None
+        else:
+            self.grad.fill_(0.0)
+
+    # In-place operations. These write into the storage of `self` and are
+    # not recorded by autodiff, so they are only allowed on tensors that
+    # are not the output of a tracked function (e.g. parameters and grads).
+    # They bump `version`, so a backward reading a modified saved tensor fails.
+    def _check_inplace(self) -> None:
+        assert (
+            self.history is None or self.history.last_fn is None
+        ), "In-place operation on a tensor computed by autodiff."
+        self._tensor._version[0] += 1
+
+    def fill_(self, value: float) -> Tensor:
+        """Set every element of this tensor to `value`, in place.
+
+        Args:
+        ----
+            value (float): The value to fill with.
+
+        Returns:
+        -------
+            Tensor: This tensor.
+
+        """
+        self._check_inplace()
+        self.f.id_map(self._ensure_tensor(value), self)
+        return self
+
+    def copy_(self, src: TensorLike) -> Tensor:
+        """Copy the values of `src`, broadcast to this shape, in place.
+
+        Args:
+        ----
+            src (TensorLike): The tensor or scalar to copy from.
+
+        Returns:
+        -------
+            Tensor: This tensor.
+
+        """
+        self._check_inplace()
+        self.f.id_map(self._ensure_tensor(src), self)
+        return self
+
+    def add_(self, b: TensorLike) -> Tensor:
+        """Add another tensor or scalar to this tensor, in place.
+
+        Args:
+        ----
+            b (TensorLike): The tensor or scalar to add.
+
+        Returns:
+        -------
+            Tensor: This tensor.
+
+        """
+        self._check_inplace()
+        self.f.add_zip(self, self._ensure_tensor(b), self)
+        return self
+
+    def sub_(self, b: TensorLike) -> Tensor:
+        """Subtract another tensor or scalar from this tensor, in place.
+
+        Args:
+        ----
+            b (TensorLike): The tensor or scalar to subtract.
+
+        Returns:
+        -------
+            Tensor: This tensor.
+
+        """
+        self._check_inplace()
+        self.f.sub_zip(self, self._ensure_tensor(b), self)
+        return self
+
+    def mul_(self, b: TensorLike) -> Tensor:
+        """Multiply this tensor by another tensor or scalar, in place.
+
+        Args:
+        ----
+            b (TensorLike): The tensor or scalar to multiply by.
+
+        Returns:
+        -------
+            Tensor: This tensor.
+
+        """
+        self._check_inplace()
+        self.f.mul_zip(self, self._ensure_tensor(b), self)
+        return self
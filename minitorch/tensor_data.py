@@ -1,13 +1,13 @@
 from __future__ import annotations
 
 import random
-from typing import Iterable, Optional, Sequence, Tuple, Union
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
 import numba
 import numba.cuda
 import numpy as np
 import numpy.typing as npt
-from numpy import array, float64
+from numpy import array, bool_, float32, float64
 from typing_extensions import TypeAlias
 
 from .operators import prod
@@ -21,12 +21,33 @@ class IndexingError(RuntimeError):
     pass
 
 
-Storage: TypeAlias = npt.NDArray[np.float64]
+Storage: TypeAlias = npt.NDArray[np.floating]
 OutIndex: TypeAlias = npt.NDArray[np.int32]
 Index: TypeAlias = npt.NDArray[np.int32]
 Shape: TypeAlias = npt.NDArray[np.int32]
 Strides: TypeAlias = npt.NDArray[np.int32]
 
+# Types a tensor can be stored in: floating point values, or compact
+# masks produced by comparisons.
+DTYPES = (float32, float64, bool_)
+
+
+def float_dtype(dtype: npt.DTypeLike) -> np.dtype:
+    """`dtype` if it is a floating point type, else float64.
+
+    Args:
+    ----
+        dtype: one of `DTYPES`
+
+    Returns:
+    -------
+        The type arithmetic on tensors of `dtype` produces.
+
+    """
+    dtype = np.dtype(dtype)
+    return dtype if np.issubdtype(dtype, np.floating) else np.dtype(float64)
+
+
 UserIndex: TypeAlias = Sequence[int]
 UserShape: TypeAlias = Sequence[int]
 UserStrides: TypeAlias = Sequence[int]
@@ -99,6 +120,33 @@ def broadcast_index(
     return None
 
 
+def broadcast_strides(big_shape: Shape, shape: Shape, strides: Strides) -> Strides:
+    """Align the `strides` of a tensor of `shape` to the dimensions of `big_shape`.
+
+    Following broadcasting rules, the result has one entry per dimension of
+    `big_shape`, and is 0 along dimensions that are missing from or have
+    size 1 in `shape`. Stepping an index of `big_shape` by one along
+    dimension `d` moves the position in the smaller tensor by `result[d]`.
+
+    Args:
+    ----
+        big_shape (Shape): Tensor shape of bigger tensor.
+        shape (Shape): Tensor shape of smaller tensor.
+        strides (Strides): Tensor strides of smaller tensor.
+
+    Returns:
+    -------
+        Strides: Broadcast strides of the smaller tensor.
+
+    """
+    out_strides = np.zeros_like(big_shape)
+    offset = len(big_shape) - len(shape)
+    for i in range(len(shape)):
+        if shape[i] > 1:
+            out_strides[i + offset] = strides[i]
+    return out_strides
+
+
 def shape_broadcast(shape1: UserShape, shape2: UserShape) -> UserShape:
     """Broadcast two shapes to create a new union shape.
 
@@ -137,6 +185,45 @@ def shape_broadcast(shape1: UserShape, shape2: UserShape) -> UserShape:
     return tuple(result_shape)
 
 
+def coalesce_dims(
+    shape: UserShape, strides: Sequence[UserStrides]
+) -> Tuple[UserShape, List[UserStrides]]:
+    """Collapse a shape and the strides of every operand over it to the lowest rank.
+
+    Size-1 dimensions are dropped, and adjacent dimensions are merged when,
+    for every operand, the outer stride equals the inner stride times the
+    inner size. Walking the result in row-major order visits the same
+    positions of each operand as walking the original `shape`.
+
+    Args:
+    ----
+        shape (UserShape): Shape shared by all operands.
+        strides (Sequence[UserStrides]): Strides of each operand, aligned to `shape`.
+
+    Returns:
+    -------
+        Tuple[UserShape, List[UserStrides]]: Coalesced shape (empty if every
+        dimension has size 1) and the coalesced strides of each operand.
+
+    """
+    new_shape: List[int] = []
+    new_strides: List[List[int]] = [[] for _ in strides]
+    for d, size in enumerate(shape):
+        if size == 1:
+            continue
+        if new_shape and all(
+            ns[-1] == st[d] * size for ns, st in zip(new_strides, strides)
+        ):
+            new_shape[-1] *= size
+            for ns, st in zip(new_strides, strides):
+                ns[-1] = st[d]
+        else:
+            new_shape.append(size)
+            for ns, st in zip(new_strides, strides):
+                ns.append(st[d])
+    return tuple(new_shape), [tuple(ns) for ns in new_strides]
+
+
 def strides_from_shape(shape: UserShape) -> UserStrides:
     """Return a contiguous stride for a given shape.
 
@@ -165,6 +252,8 @@ class TensorData:
         _storage (Storage): The underlying storage array for tensor data.
         _strides (Strides): The strides for indexing into the storage.
         _shape (Shape): The shape of the tensor.
+        offset (int): Position in storage of the first element. Views of part
+            of a tensor share its storage and start at a later position.
         strides (UserStrides): User-friendly strides.
         shape (UserShape): User-friendly shape.
         dims (int): Number of dimensions.
@@ -175,6 +264,7 @@ class TensorData:
     _storage: Storage
     _strides: Strides
     _shape: Shape
+    offset: int
     strides: UserStrides
     shape: UserShape
     dims: int
@@ -185,6 +275,8 @@ class TensorData:
         storage: Union[Sequence[float], Storage],
         shape: UserShape,
         strides: Optional[UserStrides] = None,
+        dtype: Optional[npt.DTypeLike] = None,
+        offset: int = 0,
     ):
         """Initialize a TensorData object.
 
@@ -193,12 +285,21 @@ class TensorData:
             storage (Union[Sequence[float], Storage]): The data for the tensor.
             shape (UserShape): The shape of the tensor.
             strides (Optional[UserStrides]): The strides for the tensor. If None, will be calculated from the shape.
+            dtype (Optional[DTypeLike]): One of `DTYPES`. If None, an array storage keeps its type and
+                other storage is float64. bool storage holds masks.
+            offset (int): Position in storage of the first element.
 
         """
         if isinstance(storage, np.ndarray):
-            self._storage = storage
+            self._storage = (
+                storage if dtype is None else storage.astype(dtype, copy=False)
+            )
         else:
-            self._storage = array(storage, dtype=float64)
+            self._storage = array(storage, dtype=float64 if dtype is None else dtype)
+        assert self._storage.dtype in DTYPES, f"Unsupported dtype {self._storage.dtype}"
+        self.dtype = self._storage.dtype
+        # Number of in-place writes to the storage, shared with its views.
+        self._version = [0]
 
         if strides is None:
             strides = strides_from_shape(shape)
@@ -213,7 +314,13 @@ class TensorData:
         self.dims = len(strides)
         self.size = int(prod([ele for ele in shape]))
         self.shape = shape
-        assert len(self._storage) == self.size
+        self.offset = offset
+        if not isinstance(storage, np.ndarray):
+            assert len(self._storage) == self.size
+        elif self.size > 0:
+            # Arrays may be shared with other, larger tensors.
+            last = offset + sum((s - 1) * st for s, st in zip(shape, strides))
+            assert 0 <= offset and last < len(self._storage), "View out of storage"
 
     def to_cuda_(self) -> None:  # pragma: no cover
         """Convert the storage to CUDA memory."""
@@ -223,16 +330,20 @@ class TensorData:
     def is_contiguous(self) -> bool:
         """Check if the tensor data is stored contiguously.
 
+        The elements must fill a block of storage in row-major order, so a
+        view of part of a tensor may not be contiguous even if its strides
+        are decreasing.
+
         Returns
         -------
             bool: True if the data is contiguous, False otherwise.
 
         """
-        last = 1e9
-        for stride in self._strides:
-            if stride > last:
+        expected = 1
+        for size, stride in zip(reversed(self.shape), reversed(self.strides)):
+            if size > 1 and stride != expected:
                 return False
-            last = stride
+            expected *= size
         return True
 
     @staticmethod
@@ -287,7 +398,7 @@ class TensorData:
                 raise IndexingError(f"Negative indexing for {aindex} not supported.")
 
         # Call fast indexing.
-        return index_to_position(aindex, self._strides)
+        return self.offset + index_to_position(aindex, self._strides)
 
     def indices(self) -> Iterable[UserIndex]:
         """Generate all possible indices for the tensor.
@@ -325,8 +436,7 @@ class TensorData:
             float: The value at the specified index.
 
         """
-        x: float = self._storage[self.index(key)]
-        return x
+        return float(self._storage[self.index(key)])
 
     def set(self, key: UserIndex, val: float) -> None:
         """Set the value at the specified index.
@@ -342,12 +452,103 @@ class TensorData:
     def tuple(self) -> Tuple[Storage, Shape, Strides]:
         """Return the core tensor data as a tuple.
 
+        The storage starts at `offset`, as a view without copying, so that
+        kernels can index it with the strides alone.
+
         Returns
         -------
             Tuple[Storage, Shape, Strides]: The storage, shape, and strides.
 
         """
-        return (self._storage, self._shape, self._strides)
+        storage = self._storage[self.offset :] if self.offset else self._storage
+        return (storage, self._shape, self._strides)
+
+    @staticmethod
+    def from_numpy(arr: npt.NDArray) -> TensorData:
+        """Wrap a numpy array, sharing its memory when possible.
+
+        The storage is a flat view of the memory spanned by `arr`, and the
+        strides are its byte strides in elements. Arrays of another type are
+        converted to float64, and arrays with negative strides are copied.
+
+        Args:
+        ----
+            arr: the array to wrap
+
+        Returns:
+        -------
+            TensorData: Tensor data with the shape and values of `arr`.
+
+        """
+        if arr.dtype not in DTYPES:
+            arr = arr.astype(float64)
+        if arr.ndim == 0:
+            arr = arr.reshape(1)
+        item = arr.itemsize
+        if any(st < 0 or st % item for st in arr.strides):
+            arr = np.ascontiguousarray(arr)
+        strides = tuple(st // item for st in arr.strides)
+        span = 0
+        if arr.size:
+            span = 1 + sum((s - 1) * st for s, st in zip(arr.shape, strides))
+        storage = np.lib.stride_tricks.as_strided(arr, (span,), (item,))
+        return TensorData(storage, tuple(arr.shape), strides)
+
+    def to_numpy(self) -> npt.NDArray:
+        """Numpy array of the tensor data.
+
+        On the CPU this is a view of the storage with the same strides, so
+        writing to it writes to the tensor. CUDA data is copied to the host.
+
+        Returns
+        -------
+            numpy.ndarray: Array with the shape and values of the tensor.
+
+        """
+        storage = self.tuple()[0]
+        if numba.cuda.is_cuda_array(storage):  # pragma: no cover
+            storage = storage.copy_to_host()
+        item = storage.itemsize
+        return np.lib.stride_tricks.as_strided(
+            storage, self.shape, tuple(st * item for st in self.strides)
+        )
+
+    def slice(self, spec: Sequence[Tuple[int, int, int]]) -> TensorData:
+        """View of part of the tensor, sharing its storage.
+
+        Args:
+        ----
+            spec: for each dimension, `(start, length, step)` selecting
+                `length` indices `start, start + step, ...`. A step of 0
+                selects the single index `start` and removes the dimension.
+
+        Returns:
+        -------
+            TensorData: The view.
+
+        Raises:
+        ------
+            IndexingError: If the selection is out of range.
+
+        """
+        if len(spec) != self.dims:
+            raise IndexingError(f"Slice {spec} must be size of {self.shape}.")
+        offset = self.offset
+        shape: List[int] = []
+        strides: List[int] = []
+        for (start, length, step), size, stride in zip(spec, self.shape, self.strides):
+            last = start + step * (length - 1)
+            if min(start, step, length) < 0 or (length and last >= size):
+                raise IndexingError(f"Slice {spec} out of range {self.shape}.")
+            if length:
+                offset += start * stride
+            if step == 0:
+                continue
+            shape.append(length)
+            strides.append(stride * step)
+        out = TensorData(self._storage, tuple(shape), tuple(strides), offset=offset)
+        out._version = self._version
+        return out
 
     def permute(self, *order: int) -> TensorData:
         """Permute the dimensions of the tensor.
@@ -371,7 +572,9 @@ class TensorData:
 
         new_shape = tuple(self.shape[i] for i in order)
         new_strides = tuple(self.strides[i] for i in order)
-        return TensorData(self._storage, new_shape, new_strides)
+        out = TensorData(self._storage, new_shape, new_strides, offset=self.offset)
+        out._version = self._version
+        return out
 
     def to_string(self) -> str:
         """Convert the tensor data to a string representation.
@@ -391,7 +594,7 @@ class TensorData:
                     break
             s += l
             v = self.get(index)
-            s += f"{v:3.2f}"
+            s += f"{float(v):3.2f}"
             l = ""
             for i in range(len(index) - 1, -1, -1):
                 if index[i] == self.shape[i] - 1:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import inspect
 import random
 from typing import TYPE_CHECKING, Optional
 
@@ -9,12 +10,14 @@ import numpy as np
 
 import minitorch
 
-from . import operators
-from .autodiff import Context
+from . import fusion, operators, profiling
+from .autodiff import Context, _grad_mode, enable_grad, no_grad
 from .tensor_ops import SimpleBackend, TensorBackend
 
 if TYPE_CHECKING:
-    from typing import Any, List, Tuple
+    from typing import Any, Callable, Dict, List, Sequence, Tuple, Type
+
+    import numpy.typing as npt
 
     from .tensor import Tensor
     from .tensor_data import UserIndex, UserShape
@@ -31,27 +34,50 @@ def wrap_tuple(x: Any) -> tuple:  # type: ignore
 class Function:
     @classmethod
     def _backward(cls, ctx: Context, grad_out: Tensor) -> Tuple[Tensor, ...]:
+        ctx.check_saved_versions()
+        prof = profiling._active
+        if prof is not None:
+            allocator = grad_out.backend.allocator
+            out = prof.record(
+                cls.__name__, "backward", allocator, cls.backward, ctx, grad_out
+            )
+            return wrap_tuple(out)
         return wrap_tuple(cls.backward(ctx, grad_out))  # type: ignore
 
     @classmethod
-    def _forward(cls, ctx: Context, *inps: Tensor) -> Tensor:
-        return cls.forward(ctx, *inps)  # type: ignore
+    def _forward(cls, ctx: Context, *inps: Tensor, **static: Any) -> Tensor:
+        prof = profiling._active
+        if prof is not None:
+            allocator = inps[0].backend.allocator if inps else None
+            return prof.record(
+                cls.__name__, None, allocator, cls.forward, ctx, *inps, **static
+            )
+        return cls.forward(ctx, *inps, **static)  # type: ignore
 
     @classmethod
-    def apply(cls, *vals: Tensor) -> Tensor:
-        """Call the forward function and track history"""
+    def apply(cls, *vals: Tensor, **static: Any) -> Tensor:
+        """Call the forward function and track history
+
+        Keyword arguments are static: plain Python values passed to forward
+        as is. They are not part of the history and backward returns
+        derivatives for the tensor arguments only.
+
+        Under `inference_mode`, only the forward function is called.
+        """
+        if _grad_mode.inference:
+            return cls._forward(_INFERENCE_CONTEXT, *vals, **static)
         raw_vals = []
         need_grad = False
         for v in vals:
             if v.requires_grad():
-                need_grad = True
+                need_grad = _grad_mode.enabled
             raw_vals.append(v.detach())
 
         # Create the context.
         ctx = Context(not need_grad)
 
         # Call forward with the variables.
-        c = cls._forward(ctx, *raw_vals)
+        c = cls._forward(ctx, *raw_vals, **static)
         # assert isinstance(c, Tensor), "Expected return type Tensor got %s" % (
         #     type(c)
         # )
@@ -63,6 +89,10 @@ class Function:
         return minitorch.Tensor(c._tensor, back, backend=c.backend)
 
 
+# Shared by all functions applied in inference mode, it saves nothing.
+_INFERENCE_CONTEXT = Context(no_grad=True)
+
+
 class Neg(Function):
     @staticmethod
     def forward(ctx: Context, t1: Tensor) -> Tensor:
@@ -170,7 +200,7 @@ class Add(Function):
 
 class All(Function):
     @staticmethod
-    def forward(ctx: Context, a: Tensor, dim: Optional[Tensor] = None) -> Tensor:
+    def forward(ctx: Context, a: Tensor, dim: Optional[int] = None) -> Tensor:
         """Forward pass to check if all elements are True.
 
         Args:
@@ -185,7 +215,7 @@ class All(Function):
 
         """
         if dim is not None:
-            return a.f.mul_reduce(a, int(dim.item()))
+            return a.f.mul_reduce(a, dim)
         else:
             return a.f.mul_reduce(
                 a.contiguous().view(int(operators.prod([ele for ele in a.shape]))), 0
@@ -266,17 +296,7 @@ class Sigmoid(Function):
 
         """
         (sigmoid_t1,) = ctx.saved_values
-        one = minitorch.Tensor.make(
-            [1.0] * int(operators.prod(sigmoid_t1.shape)),
-            shape=sigmoid_t1.shape,
-            strides=None,
-            backend=sigmoid_t1.backend,
-        )
-
-        grad = grad_output.f.mul_zip(
-            grad_output, sigmoid_t1.f.mul_zip(sigmoid_t1, one - sigmoid_t1)
-        )
-        return grad
+        return sigmoid_back(sigmoid_t1, grad_output)
 
 
 class ReLU(Function):
@@ -296,8 +316,11 @@ class ReLU(Function):
             Tensor: The result after applying the ReLU function.
 
         """
-        ctx.save_for_backward(t1)
-        return t1.f.relu_map(t1)
+        out = t1.f.relu_map(t1)
+        if not ctx.no_grad:
+            # Only the sign is needed for backward: keep a compact mask.
+            ctx.save_for_backward(t1.f.lt_zip(t1._ensure_tensor(0.0), out))
+        return out
 
     @staticmethod
     def backward(ctx: Context, grad_output: Tensor) -> Tensor:
@@ -313,8 +336,8 @@ class ReLU(Function):
             Tensor: The gradient with respect to the input.
 
         """
-        (t1,) = ctx.saved_values
-        grad = grad_output.f.relu_back_zip(t1, grad_output)
+        (mask,) = ctx.saved_values
+        grad = grad_output.f.relu_back_zip(mask, grad_output)
         return grad
 
 
@@ -401,32 +424,27 @@ class Sum(Function):
     """Summation function over tensor elements."""
 
     @staticmethod
-    def forward(ctx: Context, t1: Tensor, dim: Tensor) -> Tensor:
+    def forward(ctx: Context, t1: Tensor, dim: Optional[int] = None) -> Tensor:
         """Forward pass for summation.
 
         Args:
         ----
             ctx (Context): The context to save information for backward computation.
             t1 (Tensor): The input tensor.
-            dim (Optional[int]): The dimension to reduce over.
+            dim (Optional[int]): The dimension to reduce over, all if None.
 
         Returns:
         -------
             Tensor: The sum of the tensor elements.
 
         """
-        if dim.shape == (1,) and int(dim.item()) == -1:
-            # no dim argument is passed in
-            ctx.save_for_backward(t1, int(dim.item()))
-            size = int(operators.prod([ele for ele in t1.shape]))
-            return t1.f.add_reduce(t1.contiguous().view(size), 0)
-        else:
-            dim_int = int(dim.item())
-            ctx.save_for_backward(t1, dim_int)
-            return t1.f.add_reduce(t1, dim_int)
+        ctx.save_for_backward(t1)
+        if dim is None:
+            return t1.f.add_reduce(t1.contiguous().view(t1.size), 0)
+        return t1.f.add_reduce(t1, dim)
 
     @staticmethod
-    def backward(ctx: Context, grad_output: Tensor) -> Tuple[Tensor, int]:
+    def backward(ctx: Context, grad_output: Tensor) -> Tensor:
         """Backward pass for summation.
 
         Args:
@@ -436,12 +454,11 @@ class Sum(Function):
 
         Returns:
         -------
-            Tuple[Tensor]: The gradient with respect to the input tensor.
+            Tensor: The gradient with respect to the input tensor.
 
         """
-        t1, dim = ctx.saved_values
-        res = t1.expand(grad_output)
-        return (res, dim)
+        (t1,) = ctx.saved_values
+        return t1.expand(grad_output)
 
 
 class LT(Function):
@@ -561,27 +578,26 @@ class IsClose(Function):
 
 class Permute(Function):
     @staticmethod
-    def forward(ctx: Context, t1: Tensor, order: Tensor) -> Tensor:
+    def forward(ctx: Context, t1: Tensor, order: Tuple[int, ...]) -> Tensor:
         """Forward pass for permuting tensor dimensions.
 
         Args:
         ----
             ctx (Context): The context to save information for backward computation.
             t1 (Tensor): The input tensor.
-            order (Tensor): A tensor containing the new order of dimensions.
+            order (Tuple[int, ...]): The new order of dimensions.
 
         Returns:
         -------
             Tensor: The permuted tensor.
 
         """
-        order_tuple = tuple(int(order[i]) for i in range(order.size))
-        ctx.save_for_backward(order_tuple)
+        ctx.save_for_backward(order)
         # Permute the tensor dimensions
-        return t1._new(t1._tensor.permute(*order_tuple))
+        return t1._new(t1._tensor.permute(*order))
 
     @staticmethod
-    def backward(ctx: Context, grad_output: Tensor) -> Tuple[Tensor, int]:
+    def backward(ctx: Context, grad_output: Tensor) -> Tensor:
         """Backward pass for permuting tensor dimensions.
 
         Args:
@@ -591,7 +607,7 @@ class Permute(Function):
 
         Returns:
         -------
-            Tuple[Tensor, None]: The gradient with respect to the input tensor and None for the 'order' gradient.
+            Tensor: The gradient with respect to the input tensor.
 
         """
         (order,) = ctx.saved_values
@@ -600,19 +616,19 @@ class Permute(Function):
         for i, o in enumerate(order):
             inv_order[o] = i
         # Permute gradient back to original order
-        return (grad_output._new(grad_output._tensor.permute(*inv_order)), -1)
+        return grad_output._new(grad_output._tensor.permute(*inv_order))
 
 
 class View(Function):
     @staticmethod
-    def forward(ctx: Context, a: Tensor, shape: Tensor) -> Tensor:
+    def forward(ctx: Context, a: Tensor, shape: Tuple[int, ...]) -> Tensor:
         """Forward pass for viewing tensor with a new shape.
 
         Args:
         ----
             ctx (Context): The context to save information for backward computation.
             a (Tensor): The input tensor.
-            shape (Tensor): A tensor containing the new shape.
+            shape (Tuple[int, ...]): The new shape.
 
         Returns:
         -------
@@ -625,23 +641,60 @@ class View(Function):
         """
         ctx.save_for_backward(a.shape)
         assert a._tensor.is_contiguous(), "Must be contiguous to view"
-        shape2 = [int(shape[i]) for i in range(shape.size)]
-        return minitorch.Tensor.make(
-            a._tensor._storage, tuple(shape2), backend=a.backend
+        out = minitorch.Tensor.make(
+            a._tensor._storage,
+            shape,
+            backend=a.backend,
+            offset=a._tensor.offset,
         )
+        out._tensor._version = a._tensor._version
+        return out
 
     @staticmethod
-    def backward(ctx: Context, grad_output: Tensor) -> Tuple[Tensor, float]:
+    def backward(ctx: Context, grad_output: Tensor) -> Tensor:
         """Matrix Multiply backward (module 3)"""
         (original,) = ctx.saved_values
-        return (
-            minitorch.Tensor.make(
-                grad_output._tensor._storage, original, backend=grad_output.backend
-            ),
-            0.0,
+        if not grad_output._tensor.is_contiguous():
+            grad_output = grad_output.contiguous()
+        return minitorch.Tensor.make(
+            grad_output._tensor._storage,
+            original,
+            backend=grad_output.backend,
+            offset=grad_output._tensor.offset,
         )
 
 
+class Slice(Function):
+    @staticmethod
+    def forward(
+        ctx: Context, a: Tensor, spec: Sequence[Tuple[int, int, int]]
+    ) -> Tensor:
+        """Forward pass for selecting part of a tensor, without copying.
+
+        Args:
+        ----
+            ctx (Context): The context to save information for backward computation.
+            a (Tensor): The input tensor.
+            spec (Sequence[Tuple[int, int, int]]): `(start, length, step)`
+                per dimension, see `TensorData.slice`.
+
+        Returns:
+        -------
+            Tensor: A view of the selected elements of `a`.
+
+        """
+        ctx.save_for_backward(a.shape, spec)
+        return a._new(a._tensor.slice(spec))
+
+    @staticmethod
+    def backward(ctx: Context, grad_output: Tensor) -> Tensor:
+        """Scatter the gradient into zeros shaped like the input."""
+        shape, spec = ctx.saved_values
+        grad = grad_output.zeros(shape)
+        grad_output.f.id_map(grad_output, grad._new(grad._tensor.slice(spec)))
+        return grad
+
+
 class Copy(Function):
     @staticmethod
     def forward(ctx: Context, a: Tensor) -> Tensor:
@@ -677,47 +730,355 @@ class MatMul(Function):
         )
 
 
+class Fused:
+    """Elementwise function of several tensors fused into a single kernel.
+
+    `fn` is written with `Tensor` arithmetic and methods (`+`, `-`, `*`,
+    `/`, comparisons, `log`, `exp`, `sigmoid`, `relu`) and float constants.
+    It is traced once into an expression (see `fusion.py`), which backends
+    compile into one n-ary zip kernel, so the forward pass reads each input
+    once and allocates only the output, instead of one kernel launch and
+    one intermediate tensor per operation. The backward pass is derived
+    symbolically and uses one fused kernel per input.
+
+    Backends that do not support fusion evaluate `fn` on the tensors
+    directly.
+    """
+
+    def __init__(self, fn: Callable[..., Any]):
+        self.fn = fn
+        n = len(inspect.signature(fn).parameters)
+        expr = fusion.trace(fn, n)
+        grad = fusion.Var(n)
+        self.exprs = [expr] + [grad * expr.diff(i) for i in range(n)]
+        self._kernels: Dict[Any, List[Optional[Callable[..., Tensor]]]] = {}
+        self._supported: Dict[Any, bool] = {}
+
+        fused = self
+
+        class FusedFunction(Function):
+            @staticmethod
+            def forward(ctx: Context, *inputs: Tensor) -> Tensor:
+                ctx.save_for_backward(*inputs)
+                return fused.kernel(inputs[0].backend, 0)(*inputs)
+
+            @staticmethod
+            def backward(ctx: Context, grad_output: Tensor) -> Tuple[Tensor, ...]:
+                inputs = ctx.saved_values
+                return tuple(
+                    fused.kernel(grad_output.backend, i + 1)(*inputs, grad_output)
+                    for i in range(n)
+                )
+
+        self.function: Type[Function] = FusedFunction
+
+    def kernel(self, backend: TensorBackend, i: int) -> Callable[..., Tensor]:
+        """Compiled kernel of expression `i` (0 is forward, `1 + k` the grad of input k)."""
+        kernels = self._kernels.get(backend.ops, [None] * len(self.exprs))
+        k = kernels[i]
+        if k is None:
+            # Cached only once built, a failed build is not a kernel.
+            k = kernels[i] = backend.ops.nzip(self.exprs[i])
+            self._kernels[backend.ops] = kernels
+        return k
+
+    def supported(self, backend: TensorBackend) -> bool:
+        """Whether `backend` can run fused kernels."""
+        ops = backend.ops
+        if ops not in self._supported:
+            try:
+                self.kernel(backend, 0)
+                self._supported[ops] = True
+            except NotImplementedError:
+                self._supported[ops] = False
+        return self._supported[ops]
+
+    def __call__(self, *vals: Tensor) -> Tensor:
+        """Apply the fused function, tracking history like any `Function`."""
+        if not self.supported(vals[0].backend):
+            return self.fn(*vals)
+        return self.function.apply(*vals)
+
+
+def fuse(fn: Callable[..., Any]) -> Fused:
+    """Fuse an elementwise function of tensors into a single kernel.
+
+    Example ::
+
+        bce = fuse(lambda out, y: -(out * y + (out - 1.0) * (y - 1.0)).log())
+        loss = bce(out, y)
+
+    Args:
+    ----
+        fn: elementwise function of tensors, see `Fused`
+
+    Returns:
+    -------
+        Fused function with the same results and gradients as `fn`.
+
+    """
+    return Fused(fn)
+
+
+sigmoid_back = fuse(lambda s, d: d * (s - s * s))
+
+
+def checkpoint(fn: Callable[..., Tensor], *inputs: Tensor) -> Tensor:
+    """Apply `fn` without keeping its intermediate values for backward.
+
+    The forward pass runs `fn` under `no_grad`, so only `inputs` are saved.
+    The backward pass runs `fn` again with history, backpropagates through
+    that graph, and then frees it: gradients reach `inputs` and the
+    parameters `fn` uses as if `fn` had been applied directly. This trades
+    one extra forward pass of `fn` for the memory of its activations.
+
+    Example ::
+
+        h = checkpoint(self.block, x)
+
+    Args:
+    ----
+        fn: function of tensors returning a tensor, e.g. a `Module`; it
+            must compute the same values when called again
+        *inputs: tensors to apply `fn` to
+
+    Returns:
+    -------
+        The output of `fn`.
+
+    """
+    needs_grad = [x.requires_grad() for x in inputs]
+
+    class Checkpoint(Function):
+        @staticmethod
+        def forward(ctx: Context, *vals: Tensor) -> Tensor:
+            ctx.save_for_backward(*vals)
+            with no_grad():
+                return fn(*vals)
+
+        @staticmethod
+        def backward(ctx: Context, grad_output: Tensor) -> Tuple[Tensor, ...]:
+            vals = [x.detach() for x in ctx.saved_values]
+            for x, needs in zip(vals, needs_grad):
+                x.requires_grad_(needs)
+            with enable_grad():
+                out = fn(*vals)
+            if out.requires_grad():
+                out.backward(grad_output)
+            return tuple(x.zeros() if x.grad is None else x.grad for x in vals)
+
+    return Checkpoint.apply(*inputs)
+
+
 # Helpers for Constructing tensors
-def zeros(shape: UserShape, backend: TensorBackend = SimpleBackend) -> Tensor:
+def _filled(
+    fill: Callable[[int, npt.DTypeLike], npt.NDArray],
+    shape: UserShape,
+    backend: TensorBackend,
+    requires_grad: bool,
+    dtype: npt.DTypeLike,
+) -> Tensor:
+    """Tensor of `shape` whose storage is `fill(size, dtype)`."""
+    shape = tuple(shape)
+    storage = fill(int(operators.prod(shape)), dtype)
+    tensor = minitorch.Tensor.make(storage, shape, backend=backend, dtype=dtype)
+    tensor.requires_grad_(requires_grad)
+    return tensor
+
+
+def zeros(
+    shape: UserShape,
+    backend: TensorBackend = SimpleBackend,
+    requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+) -> Tensor:
     """Produce a zero tensor of size `shape`.
 
     Args:
     ----
         shape : shape of tensor
         backend : tensor backend
+        requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
 
     Returns:
     -------
         new tensor
 
     """
-    return minitorch.Tensor.make(
-        [0.0] * int(operators.prod([ele for ele in shape])), shape, backend=backend
-    )
+    return _filled(np.zeros, shape, backend, requires_grad, dtype)
+
+
+def ones(
+    shape: UserShape,
+    backend: TensorBackend = SimpleBackend,
+    requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+) -> Tensor:
+    """Produce a tensor of ones of size `shape`.
+
+    Args:
+    ----
+        shape : shape of tensor
+        backend : tensor backend
+        requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
+
+    Returns:
+    -------
+        new tensor
+
+    """
+    return _filled(np.ones, shape, backend, requires_grad, dtype)
+
+
+def full(
+    shape: UserShape,
+    value: float,
+    backend: TensorBackend = SimpleBackend,
+    requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+) -> Tensor:
+    """Produce a tensor of size `shape` filled with `value`.
+
+    Args:
+    ----
+        shape : shape of tensor
+        value : value of every element
+        backend : tensor backend
+        requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
+
+    Returns:
+    -------
+        new tensor
+
+    """
+
+    def fill(size: int, dtype: npt.DTypeLike) -> npt.NDArray:
+        return np.full(size, value, dtype)
+
+    return _filled(fill, shape, backend, requires_grad, dtype)
+
+
+def empty(
+    shape: UserShape,
+    backend: TensorBackend = SimpleBackend,
+    requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+) -> Tensor:
+    """Produce a tensor of size `shape` without initializing its values.
+
+    Args:
+    ----
+        shape : shape of tensor
+        backend : tensor backend
+        requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
+
+    Returns:
+    -------
+        new tensor of arbitrary values, to be overwritten
+
+    """
+    return _filled(np.empty, shape, backend, requires_grad, dtype)
+
+
+def _rng() -> np.random.Generator:
+    # Seeded from `random`, which the scripts and tests seed.
+    return np.random.default_rng(random.getrandbits(64))
 
 
 def rand(
     shape: UserShape,
     backend: TensorBackend = SimpleBackend,
     requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
 ) -> Tensor:
-    """Produce a random tensor of size `shape`.
+    """Produce a random tensor of size `shape`, uniform in [0, 1).
+
+    Values are drawn by numpy from a seed taken from Python's `random`, so
+    `random.seed` makes them reproducible.
 
     Args:
     ----
         shape : shape of tensor
         backend : tensor backend
         requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
 
     Returns:
     -------
         :class:`Tensor` : new tensor
 
     """
-    vals = [random.random() for _ in range(int(operators.prod([ele for ele in shape])))]
-    tensor = minitorch.Tensor.make(vals, shape, backend=backend)
-    tensor.requires_grad_(requires_grad)
-    return tensor
+
+    def fill(size: int, dtype: npt.DTypeLike) -> npt.NDArray:
+        return _rng().random(size).astype(dtype, copy=False)
+
+    return _filled(fill, shape, backend, requires_grad, dtype)
+
+
+def randn(
+    shape: UserShape,
+    backend: TensorBackend = SimpleBackend,
+    requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+) -> Tensor:
+    """Produce a tensor of size `shape` from the standard normal distribution.
+
+    Values are drawn by numpy from a seed taken from Python's `random`, so
+    `random.seed` makes them reproducible.
+
+    Args:
+    ----
+        shape : shape of tensor
+        backend : tensor backend
+        requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
+
+    Returns:
+    -------
+        :class:`Tensor` : new tensor
+
+    """
+
+    def fill(size: int, dtype: npt.DTypeLike) -> npt.NDArray:
+        return _rng().standard_normal(size).astype(dtype, copy=False)
+
+    return _filled(fill, shape, backend, requires_grad, dtype)
+
+
+def arange(
+    start: float,
+    stop: Optional[float] = None,
+    step: float = 1.0,
+    backend: TensorBackend = SimpleBackend,
+    requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+) -> Tensor:
+    """Produce a 1-D tensor of `start, start + step, ...` up to `stop`.
+
+    Like `range`, a single argument is the stop and the start is 0.
+
+    Args:
+    ----
+        start : first value, or the stop if `stop` is None
+        stop : end of the values, excluded
+        step : difference between values
+        backend : tensor backend
+        requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
+
+    Returns:
+    -------
+        :class:`Tensor` : new tensor
+
+    """
+    if stop is None:
+        start, stop = 0.0, start
+    vals = np.arange(start, stop, step, dtype=dtype)
+    return _filled(lambda size, dtype: vals, vals.shape, backend, requires_grad, dtype)
 
 
 def _tensor(
@@ -725,6 +1086,7 @@ def _tensor(
     shape: UserShape,
     backend: TensorBackend = SimpleBackend,
     requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
 ) -> Tensor:
     """Produce a tensor with data ls and shape `shape`.
 
@@ -734,49 +1096,48 @@ def _tensor(
         shape: shape of tensor
         backend: tensor backend
         requires_grad: turn on autodifferentiation
+        dtype: float32 or float64
 
     Returns:
     -------
         new tensor
 
     """
-    tensor = minitorch.Tensor.make(ls, shape, backend=backend)
+    tensor = minitorch.Tensor.make(ls, shape, backend=backend, dtype=dtype)
     tensor.requires_grad_(requires_grad)
     return tensor
 
 
 def tensor(
-    ls: Any, backend: TensorBackend = SimpleBackend, requires_grad: bool = False
+    ls: Any,
+    backend: TensorBackend = SimpleBackend,
+    requires_grad: bool = False,
+    dtype: npt.DTypeLike = np.float64,
 ) -> Tensor:
     """Produce a tensor with data and shape from ls
 
+    The data is always copied; see `Tensor.from_numpy` to share an array.
+
     Args:
     ----
-        ls: data for tensor
+        ls: data for tensor, nested sequences or an array
         backend : tensor backend
         requires_grad : turn on autodifferentiation
+        dtype : float32 or float64
 
     Returns:
     -------
         :class:`Tensor` : new tensor
 
     """
-
-    def shape(ls: Any) -> List[int]:
-        if isinstance(ls, (list, tuple)):
-            return [len(ls)] + shape(ls[0])
-        else:
-            return []
-
-    def flatten(ls: Any) -> List[float]:
-        if isinstance(ls, (list, tuple)):
-            return [y for x in ls for y in flatten(x)]
-        else:
-            return [ls]
-
-    cur = flatten(ls)
-    shape2 = shape(ls)
-    return _tensor(cur, tuple(shape2), backend=backend, requires_grad=requires_grad)
+    arr = np.array(ls, dtype=dtype)
+    return _tensor(
+        arr.reshape(-1),
+        tuple(arr.shape),
+        backend=backend,
+        requires_grad=requires_grad,
+        dtype=dtype,
+    )
 
 
 # Gradient check for tensors
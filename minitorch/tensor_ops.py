@@ -1,19 +1,27 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Callable, Optional, Type
+import itertools
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence, Tuple, Type
 
 import numpy as np
 from typing_extensions import Protocol
 
-from . import operators
+from . import operators, profiling
+from .allocator import CachingAllocator
 from .tensor_data import (
+    DTYPES,
     broadcast_index,
+    float_dtype,
     index_to_position,
     shape_broadcast,
     to_index,
 )
 
 if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from .fusion import Expr
     from .tensor import Tensor
     from .tensor_data import Shape, Storage, Strides
 
@@ -24,26 +32,44 @@ class MapProto(Protocol):
         ...
 
 
+class ZipProto(Protocol):
+    def __call__(self, a: Tensor, b: Tensor, out: Optional[Tensor] = ..., /) -> Tensor:
+        """Call a zip function"""
+        ...
+
+
+class ReduceProto(Protocol):
+    def __call__(self, a: Tensor, dim: int, out: Optional[Tensor] = ..., /) -> Tensor:
+        """Call a reduce function"""
+        ...
+
+
 class TensorOps:
     @staticmethod
-    def map(fn: Callable[[float], float]) -> MapProto:
+    def map(fn: Callable[[float], float], keep_dtype: bool = False) -> MapProto:
         """Map placeholder"""
         ...
 
     @staticmethod
     def zip(
         fn: Callable[[float, float], float],
-    ) -> Callable[[Tensor, Tensor], Tensor]:
-        """Zip placeholder"""
+        out_dtype: Optional[npt.DTypeLike] = None,
+    ) -> ZipProto:
+        """Zip placeholder
+
+        Like map and reduce, unless `out_dtype` is given the result is of
+        type `float_dtype` of the inputs, so arithmetic on bool masks
+        gives floats.
+        """
         ...
 
     @staticmethod
-    def reduce(
-        fn: Callable[[float, float], float], start: float = 0.0
-    ) -> Callable[[Tensor, int], Tensor]:
+    def reduce(fn: Callable[[float, float], float], start: float = 0.0) -> ReduceProto:
         """Create a higher-order tensor reduce function.
 
         The returned function reduces a tensor along a specified dimension using the provided binary function `fn`.
+        Like map and zip, it writes into `out` when one of the right shape is
+        given and allocates the result otherwise, of type `float_dtype(a.dtype)`.
 
         Args:
         ----
@@ -52,27 +78,171 @@ class TensorOps:
 
         Returns:
         -------
-            Callable[[Tensor, int], Tensor]: A function that takes a tensor and a dimension, and returns a reduced tensor.
+            ReduceProto: A function that takes a tensor, a dimension and an optional output, and returns a reduced tensor.
 
         """
         ...
 
     @staticmethod
-    def matrix_multiply(a: Tensor, b: Tensor) -> Tensor:
+    def nzip(expr: Expr) -> Callable[..., Tensor]:
+        """N-ary zip of a fused elementwise expression (see `fusion.py`)"""
+        raise NotImplementedError("Fusion not supported by this backend")
+
+    @staticmethod
+    def matrix_multiply(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
         """Matrix multiply"""
         raise NotImplementedError("Not implemented in this assignment")
 
+    @staticmethod
+    def set_num_threads(n: int) -> None:
+        """Set the number of CPU threads used by kernels.
+
+        The setting applies to the calling thread and is shared by every
+        backend using the same ops, see `TensorBackend.set_num_threads` for
+        a per-backend count. Backends that do not run on CPU threads ignore
+        it.
+        """
+
+    @staticmethod
+    def get_num_threads() -> int:
+        """Get the number of CPU threads used by kernels in the calling thread.
+
+        Backends that do not run on CPU threads report 1.
+        """
+        return 1
+
+    @staticmethod
+    def warmup(
+        backend: TensorBackend,
+        names: Sequence[str],
+        shape: Tuple[int, ...],
+        dtype: npt.DTypeLike,
+    ) -> None:
+        """Run the operators `names` of `backend` on inputs of `shape` and `dtype`.
+
+        Every operand layout the operators dispatch on is covered: zips run
+        on equal, scalar, row-broadcast and transposed operands, maps and
+        reductions on contiguous and transposed ones. Operators the ops do
+        not implement are skipped.
+
+        Args:
+        ----
+            backend: backend whose operators are run
+            names: keys of `BACKEND_OPERATORS` or `"matrix_multiply"`
+            shape: shape of the inputs
+            dtype: type of the inputs
+
+        """
+        from .tensor import Tensor
+
+        def make(shape: Tuple[int, ...]) -> Tensor:
+            size = int(operators.prod(list(shape)))
+            return Tensor.make([1.0] * size, shape, backend=backend, dtype=dtype)
+
+        a = make(shape)
+        # Same shape as `a`, with its strides reversed.
+        t = make(shape[::-1]).permute(*reversed(range(a.dims)))
+        one, row = make((1,)), make(shape[-1:])
+        for name in names:
+            try:
+                op = getattr(backend, name)
+                if name == "matrix_multiply":
+                    if a.dims >= 2:
+                        order = list(range(a.dims))
+                        order[-2], order[-1] = order[-1], order[-2]
+                        op(a, a.permute(*order))
+                elif BACKEND_OPERATORS[name][0] == "reduce":
+                    for x, dim in itertools.product([a, t], range(a.dims)):
+                        op(x, dim)
+                elif BACKEND_OPERATORS[name][0] == "zip":
+                    for x, y in [
+                        (a, a),
+                        (a, one),
+                        (one, a),
+                        (a, row),
+                        (row, a),
+                        (a, t),
+                    ]:
+                        op(x, y)
+                else:
+                    op(a)
+                    op(t)
+            except NotImplementedError:
+                continue
+
     cuda = False
 
 
+# Operators of a tensor backend, by attribute name: the higher-order
+# function of `TensorOps` that builds it and its arguments. Comparisons
+# produce compact bool masks and copies keep the type of their input, the
+# other operators produce floats.
+BACKEND_OPERATORS: Dict[str, Tuple[str, Callable[..., float], Tuple[Any, ...]]] = {
+    # Maps
+    "neg_map": ("map", operators.neg, ()),
+    "sigmoid_map": ("map", operators.sigmoid, ()),
+    "relu_map": ("map", operators.relu, ()),
+    "log_map": ("map", operators.log, ()),
+    "exp_map": ("map", operators.exp, ()),
+    "id_map": ("map", operators.id, (True,)),
+    "inv_map": ("map", operators.inv, ()),
+    # Zips
+    "add_zip": ("zip", operators.add, ()),
+    "sub_zip": ("zip", operators.sub, ()),
+    "mul_zip": ("zip", operators.mul, ()),
+    "lt_zip": ("zip", operators.lt, (np.bool_,)),
+    "eq_zip": ("zip", operators.eq, (np.bool_,)),
+    "is_close_zip": ("zip", operators.is_close, (np.bool_,)),
+    "relu_back_zip": ("zip", operators.relu_back, ()),
+    "log_back_zip": ("zip", operators.log_back, ()),
+    "inv_back_zip": ("zip", operators.inv_back, ()),
+    # Reduce
+    "add_reduce": ("reduce", operators.add, (0.0,)),
+    "mul_reduce": ("reduce", operators.mul, (1.0,)),
+}
+
+
+def _with_num_threads(
+    ops: Type[TensorOps], n: int, fn: Callable[..., Tensor]
+) -> Callable[..., Tensor]:
+    """Operator `fn`, run on `n` threads of `ops` in the calling thread."""
+
+    def op(*args: Any, **kwargs: Any) -> Tensor:
+        previous = ops.get_num_threads()
+        if previous == n:
+            return fn(*args, **kwargs)
+        ops.set_num_threads(n)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            ops.set_num_threads(previous)
+
+    op.__wrapped__ = fn  # type: ignore
+    return op
+
+
 class TensorBackend:
-    def __init__(self, ops: Type[TensorOps]):
+    def __init__(
+        self,
+        ops: Type[TensorOps],
+        num_threads: Optional[int] = None,
+        allocator: Optional[CachingAllocator] = None,
+    ):
         """Dynamically construct a tensor backend based on a `tensor_ops` object
         that implements map, zip, and reduce higher-order functions.
 
+        The operators in `BACKEND_OPERATORS` (`neg_map`, `mul_zip`,
+        `add_reduce`, ...) are built on first access, so a process only
+        compiles the kernels it actually dispatches; `warmup` builds and
+        compiles a chosen subset ahead of time.
+
         Args:
         ----
             ops : tensor operations object see `tensor_ops.py`
+            num_threads : optional number of CPU threads for the kernels
+                of this backend, see `set_num_threads`
+            allocator : storage allocator for the outputs of operators and
+                `Tensor.zeros`; a new `CachingAllocator` by default
 
 
         Returns:
@@ -80,35 +250,128 @@ class TensorBackend:
             A collection of tensor functions
 
         """
-        # Maps
-        self.neg_map = ops.map(operators.neg)
-        self.sigmoid_map = ops.map(operators.sigmoid)
-        self.relu_map = ops.map(operators.relu)
-        self.log_map = ops.map(operators.log)
-        self.exp_map = ops.map(operators.exp)
-        self.id_map = ops.map(operators.id)
-        self.inv_map = ops.map(operators.inv)
-
-        # Zips
-        self.add_zip = ops.zip(operators.add)
-        self.mul_zip = ops.zip(operators.mul)
-        self.lt_zip = ops.zip(operators.lt)
-        self.eq_zip = ops.zip(operators.eq)
-        self.is_close_zip = ops.zip(operators.is_close)
-        self.relu_back_zip = ops.zip(operators.relu_back)
-        self.log_back_zip = ops.zip(operators.log_back)
-        self.inv_back_zip = ops.zip(operators.inv_back)
-
-        # Reduce
-        self.add_reduce = ops.reduce(operators.add, 0.0)
-        self.mul_reduce = ops.reduce(operators.mul, 1.0)
-        self.matrix_multiply = ops.matrix_multiply
         self.cuda = ops.cuda
+        self.ops = ops
+        self.allocator = CachingAllocator() if allocator is None else allocator
+        self._lock = threading.Lock()
+        self._num_threads: Optional[int] = None
+        self._profiled = profiling._active is not None
+        self.matrix_multiply = self._wrap("matrix_multiply", ops.matrix_multiply)
+        profiling._backends.add(self)
+        if num_threads is not None:
+            self.set_num_threads(num_threads)
+
+    def set_num_threads(self, n: Optional[int]) -> None:
+        """Set the number of CPU threads used by the kernels of this backend.
+
+        Operators of this backend switch the calling thread to `n` threads
+        for the duration of each call and restore its previous count after,
+        so backends with different counts can be used side by side and from
+        any thread. Without a count, operators use the count of the calling
+        thread, see `TensorOps.set_num_threads`, and are not wrapped at all.
+
+        Args:
+        ----
+            n: number of threads, or None for the calling thread's count
+
+        """
+        if n is not None:
+            # Fail now on a count the ops reject rather than on first use.
+            previous = self.ops.get_num_threads()
+            self.ops.set_num_threads(n)
+            self.ops.set_num_threads(previous)
+        self._num_threads = n
+        self._rewrap()
+
+    def __getattr__(self, name: str) -> Callable[..., Tensor]:
+        # Only called when `name` is not yet an attribute: build the
+        # operator and store it, so later lookups are plain attribute reads.
+        if name not in BACKEND_OPERATORS:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        with self._lock:
+            if name not in self.__dict__:
+                kind, fn, args = BACKEND_OPERATORS[name]
+                op = getattr(self.ops, kind)(fn, *args)
+                self.__dict__[name] = self._wrap(name, op)
+        return self.__dict__[name]
+
+    def _wrap(self, name: str, op: Callable[..., Tensor]) -> Callable[..., Tensor]:
+        # The operator as called through the backend: run on the backend's
+        # thread count and recorded by the running profiler, when there
+        # are, so that it costs nothing otherwise.
+        if self._num_threads is not None:
+            op = _with_num_threads(self.ops, self._num_threads, op)
+        if self._profiled:
+            op = profiling._profiled_op(name, self, op)
+        return op
+
+    def _rewrap(self) -> None:
+        with self._lock:
+            for name in [*BACKEND_OPERATORS, "matrix_multiply"]:
+                op = self.__dict__.get(name)
+                if op is None:
+                    continue
+                while hasattr(op, "__wrapped__"):
+                    op = op.__wrapped__
+                self.__dict__[name] = self._wrap(name, op)
+
+    def _set_profiled(self, on: bool) -> None:
+        # Swap the built operators for ones recorded by the running
+        # profiler, or back.
+        self._profiled = on
+        self._rewrap()
+
+    def warmup(
+        self,
+        names: Optional[Sequence[str]] = None,
+        shapes: Sequence[Sequence[int]] = ((4, 4),),
+        background: bool = True,
+        dtypes: Sequence[npt.DTypeLike] = DTYPES,
+    ) -> Optional[threading.Thread]:
+        """Build and compile operators ahead of their first use.
+
+        Each operator is run on tensors of each of `shapes` and `dtypes`
+        in every layout it dispatches on, see `TensorOps.warmup`, which
+        compiles the kernels those inputs reach. Operators the ops do not
+        implement are skipped.
+
+        Args:
+        ----
+            names: operators to warm up, keys of `BACKEND_OPERATORS` or
+                `"matrix_multiply"`; all of them by default
+            shapes: input shapes to compile for
+            background: compile in a daemon thread instead of blocking
+            dtypes: input dtypes to compile for, all of `DTYPES` by default
+
+        Returns:
+        -------
+            The started thread if `background`, else None.
+
+        """
+        if names is None:
+            names = list(BACKEND_OPERATORS) + ["matrix_multiply"]
+
+        def run() -> None:
+            for dtype, shape in itertools.product(dtypes, shapes):
+                self.ops.warmup(self, names, tuple(shape), dtype)
+
+        if self._num_threads is not None:
+            # Calibrate and dispatch for the thread count of the backend.
+            run = _with_num_threads(self.ops, self._num_threads, run)  # type: ignore
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="minitorch-warmup", daemon=True)
+        thread.start()
+        return thread
 
 
 class SimpleOps(TensorOps):
     @staticmethod
-    def map(fn: Callable[[float], float]) -> MapProto:
+    def map(fn: Callable[[float], float], keep_dtype: bool = False) -> MapProto:
         """Higher-order tensor map function ::
 
           fn_map = map(fn)
@@ -130,6 +393,8 @@ class SimpleOps(TensorOps):
         Args:
         ----
             fn: function from float-to-float to apply.
+            keep_dtype: give the outputs the type of `a`, as copies do;
+                   by default they are of type `float_dtype(a.dtype)`
             a (:class:`TensorData`): tensor to map over
             out (:class:`TensorData`): optional, tensor data to fill in,
                    should broadcast with `a`
@@ -143,7 +408,7 @@ class SimpleOps(TensorOps):
 
         def ret(a: Tensor, out: Optional[Tensor] = None) -> Tensor:
             if out is None:
-                out = a.zeros(a.shape)
+                out = a.empty(a.shape, None if keep_dtype else float_dtype(a.dtype))
             f(*out.tuple(), *a.tuple())
             return out
 
@@ -152,11 +417,13 @@ class SimpleOps(TensorOps):
     @staticmethod
     def zip(
         fn: Callable[[float, float], float],
-    ) -> Callable[["Tensor", "Tensor"], "Tensor"]:
+        out_dtype: Optional[npt.DTypeLike] = None,
+    ) -> ZipProto:
         """Higher-order tensor zip function ::
 
           fn_zip = zip(fn)
           out = fn_zip(a, b)
+          fn_zip(a, b, out)
 
         Simple version ::
 
@@ -174,8 +441,12 @@ class SimpleOps(TensorOps):
         Args:
         ----
             fn: function from two floats-to-float to apply
+            out_dtype: type of the outputs, e.g. bool for comparisons; by
+                   default `float_dtype` of the promoted type of `a` and `b`
             a (:class:`TensorData`): tensor to zip over
             b (:class:`TensorData`): tensor to zip over
+            out (:class:`TensorData`): optional, tensor data to fill in,
+                   should have the broadcast shape of `a` and `b`
 
         Returns:
         -------
@@ -184,21 +455,25 @@ class SimpleOps(TensorOps):
         """
         f = tensor_zip(fn)
 
-        def ret(a: "Tensor", b: "Tensor") -> "Tensor":
+        def ret(a: "Tensor", b: "Tensor", out: Optional["Tensor"] = None) -> "Tensor":
             if a.shape != b.shape:
                 c_shape = shape_broadcast(a.shape, b.shape)
             else:
                 c_shape = a.shape
-            out = a.zeros(c_shape)
+            if out is None:
+                if out_dtype is None:
+                    dtype = float_dtype(np.promote_types(a.dtype, b.dtype))
+                else:
+                    dtype = np.dtype(out_dtype)
+                out = a.empty(c_shape, dtype)
+            assert out.shape == c_shape, f"Output shape {out.shape} != {c_shape}"
             f(*out.tuple(), *a.tuple(), *b.tuple())
             return out
 
         return ret
 
     @staticmethod
-    def reduce(
-        fn: Callable[[float, float], float], start: float = 0.0
-    ) -> Callable[["Tensor", int], "Tensor"]:
+    def reduce(fn: Callable[[float, float], float], start: float = 0.0) -> ReduceProto:
         """Create a higher-order tensor reduce function.
 
         The returned function reduces a tensor along a specified dimension using the provided binary function `fn`.
@@ -208,6 +483,7 @@ class SimpleOps(TensorOps):
             ```python
             fn_reduce = reduce(fn)
             out = fn_reduce(a, dim)
+            fn_reduce(a, dim, out)
             ```
 
         Simple version:
@@ -225,18 +501,22 @@ class SimpleOps(TensorOps):
 
         Returns:
         -------
-            Callable[[Tensor, int], Tensor]: A function that takes a tensor and a dimension, and returns a reduced tensor.
+            ReduceProto: A function that takes a tensor, a dimension and an optional output, and returns a reduced tensor.
 
         """
         f = tensor_reduce(fn)
 
-        def ret(a: "Tensor", dim: int) -> "Tensor":
+        def ret(a: "Tensor", dim: int, out: Optional["Tensor"] = None) -> "Tensor":
             out_shape = list(a.shape)
             out_shape[dim] = 1
 
             # Other values when not sum.
-            out = a.zeros(tuple(out_shape))
-            out._tensor._storage[:] = start
+            if out is None:
+                out = a.empty(tuple(out_shape), float_dtype(a.dtype))
+                out._tensor._storage[:] = start
+            else:
+                assert out.shape == tuple(out_shape), f"Output shape {out.shape}"
+                out.fill_(start)
 
             f(*out.tuple(), *a.tuple(), dim)
             return out
@@ -244,7 +524,44 @@ class SimpleOps(TensorOps):
         return ret
 
     @staticmethod
-    def matrix_multiply(a: "Tensor", b: "Tensor") -> "Tensor":
+    def nzip(expr: Expr) -> Callable[..., "Tensor"]:
+        """Higher-order n-ary tensor zip of a fused expression ::
+
+          fn_nzip = nzip(expr)
+          out = fn_nzip(a, b, c)
+
+        Broadcasted version ::
+
+            for i:
+                for j:
+                    out[i, j] = expr(a[i, j], b[i, 0], c[0, j])
+
+        Args:
+        ----
+            expr: traced elementwise expression over `Var(0) ... Var(n - 1)`
+
+        Returns:
+        -------
+            Function from `n` tensors to a new tensor of their broadcast shape.
+
+        """
+        f = tensor_nzip(expr.build(lambda fn: fn))
+
+        def ret(*vals: "Tensor") -> "Tensor":
+            c_shape = vals[0].shape
+            for v in vals[1:]:
+                c_shape = shape_broadcast(c_shape, v.shape)
+            dtype = float_dtype(np.result_type(*[v.dtype for v in vals]))
+            out = vals[0].empty(c_shape, dtype)
+            f(*out.tuple(), [v.tuple() for v in vals])
+            return out
+
+        return ret
+
+    @staticmethod
+    def matrix_multiply(
+        a: "Tensor", b: "Tensor", out: Optional["Tensor"] = None
+    ) -> "Tensor":
         """Matrix multiplication"""
         raise NotImplementedError("Not implemented in this assignment")
 
@@ -291,7 +608,7 @@ def tensor_map(
         in_strides: Strides,
     ) -> None:
         # TODO: Implement for Task 2.3.
-        out_size = len(out)
+        out_size = int(np.prod(out_shape))
         # store intermediary index into out and in tensor storage
         out_index = np.zeros(len(out_shape), dtype=np.int32)
         in_index = np.zeros(len(in_shape), dtype=np.int32)
@@ -302,7 +619,8 @@ def tensor_map(
             out_pos = index_to_position(out_index, out_strides)
             # get corresponding positions into 1D array storage
             in_pos = index_to_position(in_index, in_strides)
-            out[out_pos] = fn(in_storage[in_pos])
+            # float(): numpy bools do not support arithmetic.
+            out[out_pos] = fn(float(in_storage[in_pos]))
 
     return _map
 
@@ -349,7 +667,7 @@ def tensor_zip(
         b_strides: Strides,
     ) -> None:
         # TODO: Implement for Task 2.3.
-        out_size = len(out)
+        out_size = int(np.prod(out_shape))
         # intermediary index into out, a, b, tensor storage
         out_index = np.zeros(len(out_shape), dtype=np.int32)
         a_index = np.zeros(len(a_shape), dtype=np.int32)
@@ -366,7 +684,7 @@ def tensor_zip(
             a_pos = index_to_position(a_index, a_strides)
             b_pos = index_to_position(b_index, b_strides)
 
-            out[out_pos] = fn(a_storage[a_pos], b_storage[b_pos])
+            out[out_pos] = fn(float(a_storage[a_pos]), float(b_storage[b_pos]))
 
     return _zip
 
@@ -399,7 +717,7 @@ def tensor_reduce(
         reduce_dim: int,
     ) -> None:
         # TODO: Implement for Task 2.3.
-        a_size = len(a_storage)
+        a_size = int(np.prod(a_shape))
         a_index = np.zeros(len(a_shape), dtype=np.int32)
         out_index = np.zeros(len(out_shape), dtype=np.int32)
 
@@ -415,9 +733,51 @@ def tensor_reduce(
             a_pos = index_to_position(a_index, a_strides)
             out_pos = index_to_position(out_index, out_strides)
 
-            out[out_pos] = fn(out[out_pos], a_storage[a_pos])
+            out[out_pos] = fn(out[out_pos], float(a_storage[a_pos]))
 
     return _reduce
 
 
+def tensor_nzip(
+    fn: Callable[[Sequence[float]], float],
+) -> Callable[
+    [Storage, Shape, Strides, Sequence[Tuple[Storage, Shape, Strides]]], None
+]:
+    """Low-level implementation of n-ary tensor zip between
+    tensors with *possibly different strides*.
+
+    * Fill in the `out` array by applying `fn` to the values of every
+      input at each index, assuming all input shapes broadcast to
+      `out_shape`.
+
+    Args:
+    ----
+        fn: function mapping the list of input values to a float
+
+    Returns:
+    -------
+        Tensor n-ary zip function.
+
+    """
+
+    def _nzip(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        inputs: Sequence[Tuple[Storage, Shape, Strides]],
+    ) -> None:
+        out_index = np.zeros(len(out_shape), dtype=np.int32)
+        in_indices = [np.zeros(len(shape), dtype=np.int32) for _, shape, _ in inputs]
+        vals = [0.0] * len(inputs)
+
+        for i in range(int(np.prod(out_shape))):
+            to_index(i, out_shape, out_index)
+            for k, (storage, shape, strides) in enumerate(inputs):
+                broadcast_index(out_index, out_shape, shape, in_indices[k])
+                vals[k] = storage[index_to_position(in_indices[k], strides)]
+            out[index_to_position(out_index, out_strides)] = fn(vals)
+
+    return _nzip
+
+
 SimpleBackend = TensorBackend(SimpleOps)
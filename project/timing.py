@@ -18,7 +18,7 @@ def run_matmul(backend, size=16) -> None:
 
 
 if __name__ == "__main__":
-    # Warmup
+    # Warmup (FastOps kernels compile once and are then cached on disk)
     run_matmul(FastTensorBackend)
     run_matmul(GPUBackend)
 
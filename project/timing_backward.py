@@ -0,0 +1,56 @@
+import time
+
+import minitorch
+from minitorch.autodiff import topological_sort
+
+
+def build_scalar_graph(depth):
+    "Chain of `depth` layers of x = x * w + x, deeper than the recursion limit."
+    w = minitorch.Scalar(0.5)
+    x = minitorch.Scalar(1.0)
+    out = x
+    for _ in range(depth):
+        out = out * w + out
+    return out
+
+
+def build_tensor_graph(layers):
+    "Unrolled elementwise network on small tensors."
+    w = minitorch.rand((4, 4), requires_grad=True)
+    x = minitorch.rand((4, 4), requires_grad=True)
+    out = x
+    for _ in range(layers):
+        out = (out * w).relu() + out * 0.5
+    return out.sum()
+
+
+def best_of(fn, ntrials=3):
+    best = float("inf")
+    for _ in range(ntrials):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_graph(build, size):
+    out = build(size)
+    nodes = len(list(topological_sort(out)))
+    sort = best_of(lambda: topological_sort(out))
+    backward = best_of(lambda: build(size).backward())
+    return nodes, sort, backward
+
+
+if __name__ == "__main__":
+    for name, build, sizes in [
+        ("scalar", build_scalar_graph, [100, 1000, 10000, 50000]),
+        ("tensor", build_tensor_graph, [10, 100, 1000]),
+    ]:
+        print(f"{name} graphs")
+        print(f"{'nodes':>8} {'sort':>10} {'per node':>10} {'build+bwd':>10}")
+        for size in sizes:
+            nodes, sort, backward = time_graph(build, size)
+            print(
+                f"{nodes:>8} {sort * 1e3:>8.2f}ms"
+                f" {sort / nodes * 1e6:>8.2f}us {backward * 1e3:>8.1f}ms"
+            )